@@ -2,27 +2,109 @@ import streamlit as st
 import pandas as pd
 import os
 import base64
+import random
+import asyncio
+import threading
+from typing import Dict, List, Tuple
 from frankengen import (
+    random_account_holder,
+    seed_generators,
     generate_bank_statement,
     identify_template_fields,
-    generate_populated_html_and_pdf,
+    statement_output_name,
+    persist_outputs_async,
+    persist_failures,
+    get_template_env,
+    template_revision,
     BANK_CONFIG
 )
-from faker import Faker
+from frankenassets import get_asset_registry
+from frankentemplates import start_template_watcher, watchdog_available
+from frankenasync import render_statement_bytes
 from streamlit_pdf_viewer import pdf_viewer  # Add this import for streamlit-pdf-viewer
 
-fake = Faker()
 # Directory setup
 SAMPLE_LOGOS_DIR = "franken_logos"
 SYNTHETIC_STAT_DIR = "output_statements"
 TEMPLATES_DIR = "f_templates"
+# Generated statements kept in the app's result cache
+MAX_CACHED_STATEMENTS = 64
 
-# Create directories if they don’t exist
-for directory in [SAMPLE_LOGOS_DIR, SYNTHETIC_STAT_DIR, TEMPLATES_DIR]:
-    os.makedirs(directory, exist_ok=True)
+# Streamlit reruns this script on every interaction; everything below that is expensive to set up is
+# created once per server process with st.cache_resource, and generated statements are memoized with st.cache_data.
+
+# Create directories once and load the template environment
+@st.cache_resource
+def load_template_env():
+    for directory in [SAMPLE_LOGOS_DIR, SYNTHETIC_STAT_DIR, TEMPLATES_DIR]:
+        os.makedirs(directory, exist_ok=True)
+    return get_template_env(TEMPLATES_DIR)
+
+# Encode every logo once
+@st.cache_resource
+def load_logo_assets() -> int:
+    return get_asset_registry().preload([SAMPLE_LOGOS_DIR])
+
+# With watchdog installed, template edits arrive as filesystem events instead of mtime checks
+@st.cache_resource
+def load_template_watcher():
+    return start_template_watcher([TEMPLATES_DIR]) if watchdog_available() else None
+
+# One event loop for the whole server process, run on its own thread. Every session submits its
+# statement coroutines here instead of starting a loop per call with asyncio.run; the PDF concurrency
+# cap itself lives in frankenasync's shared generator.
+@st.cache_resource
+def load_event_loop() -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="franken-app-loop", daemon=True).start()
+    return loop
+
+# Revisions of every template a component map renders with. Passed to the cached functions below so
+# an edited template gives a new cache key and older results are never served.
+def component_map_revision(component_map: Tuple[Tuple[str, str], ...]) -> Tuple[int, ...]:
+    names = ["base_template.html"] + [BANK_CONFIG[bank]["components"][component] for component, bank in component_map]
+    return tuple(template_revision(TEMPLATES_DIR, name) for name in names)
+
+# Template fields of a component map as (name, is_mutable, description) rows
+@st.cache_resource
+def load_template_fields(component_map: Tuple[Tuple[str, str], ...], revision: Tuple[int, ...]) -> List[Tuple[str, bool, str]]:
+    statement_fields = identify_template_fields(dict(component_map), TEMPLATES_DIR)
+    return [(field.name, field.is_mutable, field.description) for field in statement_fields.fields]
+
+# One statement per (component_map, account_type, num_transactions, seed). Templating runs in a worker
+# process and wkhtmltopdf streams the PDF back over stdout; the HTML, PDF and CSV are written to disk in
+# the background the first time a statement is generated.
+@st.cache_data(max_entries=MAX_CACHED_STATEMENTS, show_spinner=False)
+def generate_statement_cached(component_map: Tuple[Tuple[str, str], ...], account_type: str, num_transactions: int, seed: int, revision: Tuple[int, ...]) -> Dict:
+    component_map = dict(component_map)
+    seed_generators(seed)
+    # Generate account holder based on account type
+    account_holder = random_account_holder(account_type)
+    df = generate_bank_statement(num_transactions, account_holder, account_type)
+    output_name = statement_output_name(account_holder, component_map, account_type)
+    _, pdf_content = asyncio.run_coroutine_threadsafe(render_statement_bytes(
+        df,
+        account_holder,
+        component_map,
+        account_type,
+        template_dir=TEMPLATES_DIR,
+        output_dir=SYNTHETIC_STAT_DIR,
+        output_name=output_name,
+        seed=seed
+    ), load_event_loop()).result()
+    csv_filename = os.path.join(SYNTHETIC_STAT_DIR, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}.csv")
+    persist_outputs_async({csv_filename: df.to_csv(index=False)})
+    return {
+        "pdf_content": pdf_content,
+        "pdf_file": os.path.join(SYNTHETIC_STAT_DIR, f"{output_name}.pdf"),
+        "csv_filename": csv_filename
+    }
 
 # Streamlit page configuration
 st.set_page_config(page_title="Synthetic Bank Statement Generator", page_icon="🏦", layout="wide")
+load_template_env()
+load_logo_assets()
+load_template_watcher()
 
 # Custom CSS for buttons
 st.markdown("""
@@ -81,7 +163,13 @@ with st.sidebar:
 
     # Number of transactions
     st.subheader("Number of Transactions")
-    num_transactions = st.slider("Number of Transactions", min_value=3, max_value=25, value=5, step=1)
+    num_transactions = st.slider("Number of Transactions", min_value=3, max_value=500, value=5, step=1)
+
+    # Seed: the same options and seed always produce the same statement, served from the cache
+    st.subheader("Seed")
+    if "seed" not in st.session_state:
+        st.session_state["seed"] = random.randint(0, 2**31 - 1)
+    seed = int(st.number_input("Seed", min_value=0, max_value=2**31 - 1, step=1, key="seed"))
 
     # Add spacing before Generate button
     st.markdown("<br><br>", unsafe_allow_html=True)  # Adds two line breaks
@@ -119,31 +207,22 @@ if st.session_state["trigger_generate"]:
     else:
         with st.spinner(f"Generating statement with sections from {', '.join(st.session_state['component_map'].values())}..."):
             try:
-                # Generate account holder based on account type
-                account_holder = fake.company().upper() if account_type == "business" else fake.name().upper()
-                df = generate_bank_statement(num_transactions, account_holder, account_type)
-                csv_filename = os.path.join(SYNTHETIC_STAT_DIR, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}.csv")
-                df.to_csv(csv_filename, index=False, encoding='utf-8')
-                
-                # Identify fields using the full component_map
-                statement_fields = identify_template_fields(st.session_state["component_map"], TEMPLATES_DIR)
-                results = generate_populated_html_and_pdf(
-                    df=df,
-                    account_holder=account_holder,
-                    component_map=st.session_state["component_map"],
-                    template_dir=TEMPLATES_DIR,
-                    output_dir=SYNTHETIC_STAT_DIR,
-                    account_type=account_type
-                )
-                
-                # Use the first result (single template combination)
-                html_file, pdf_file = results[0]
+                component_map = tuple(sorted(st.session_state["component_map"].items()))
+                revision = component_map_revision(component_map)
+                statement = generate_statement_cached(component_map, account_type, num_transactions, seed, revision)
+                statement_fields = load_template_fields(component_map, revision)
+                csv_filename = statement["csv_filename"]
+                pdf_file = statement["pdf_file"]
+                pdf_content = statement["pdf_content"]
                 st.session_state["generated"] = True
                 st.session_state["pdf_filename"] = os.path.basename(pdf_file)
-                with open(pdf_file, "rb") as f:
-                    st.session_state["pdf_content"] = f.read()
+                st.session_state["pdf_content"] = pdf_content
                 st.session_state["trigger_generate"] = False
                 
+                # Files are saved in the background; show saves that failed since the last generation
+                for failure in persist_failures():
+                    st.warning(f"Could not save {', '.join(failure['paths'])}: {failure['error']}")
+                
                 # Display download button
                 st.download_button(
                     label=f"Download {account_type.capitalize()} PDF",
@@ -174,14 +253,14 @@ if st.session_state["trigger_generate"]:
                     st.write(f"CSV saved: {csv_filename}")
                     st.write(f"PDF saved: {pdf_file}")
                     st.write("Template Fields:")
-                    for field in statement_fields.fields:
-                        st.write(f"- {field.name}: {'Mutable' if field.is_mutable else 'Immutable'}, {field.description}")
+                    for name, is_mutable, description in statement_fields:
+                        st.write(f"- {name}: {'Mutable' if is_mutable else 'Immutable'}, {description}")
             
             except Exception as e:
                 st.error(f"Error generating statement: {str(e)}")
                 st.markdown("""
                 **Troubleshooting**:
-                - Ensure transactions are between 3 and 25.
+                - Ensure there are at least 3 transactions.
                 - Verify the template and logo files exist in the 'f_templates' and 'franken_logos' directories.
                 - Check that wkhtmltopdf is installed.
                 - If the PDF preview or download fails, try Firefox/Edge or disable Chrome’s ad blockers.
@@ -0,0 +1,108 @@
+import os
+import io
+import base64
+import threading
+import mimetypes
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+import frankenmetrics
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; logos are embedded at their original size without it
+    Image = None
+
+LOGO_DIRS = ["franken_logos", os.path.join("super", "sample_logos")]
+# Widest logo worth embedding: about 2 inches at the 300 dpi wkhtmltopdf renders images at
+PRINT_MAX_WIDTH = 600
+
+class _Asset:
+    __slots__ = ("path", "mtime_ns", "size", "source_bytes", "data_uri")
+
+    def __init__(self, path: str, mtime_ns: int, size: int, source_bytes: int, data_uri: str):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.source_bytes = source_bytes
+        self.data_uri = data_uri
+
+# Process-wide registry of image assets encoded once as data URIs, reloaded when a file's mtime changes
+class AssetRegistry:
+    def __init__(self, max_width: Optional[int] = PRINT_MAX_WIDTH):
+        self.max_width = max_width
+        self.loads = 0
+        self.hits = 0
+        self._assets: Dict[str, _Asset] = {}
+        self._lock = threading.Lock()
+
+    # Shrink images wider than max_width; returns (bytes, mime type)
+    def _downsample(self, data: bytes, mime: str) -> tuple[bytes, str]:
+        if Image is None or not self.max_width:
+            return data, mime
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= self.max_width:
+                return data, mime
+            height = max(1, round(image.height * self.max_width / image.width))
+            resized = image.resize((self.max_width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format="PNG", optimize=True)
+        downsampled = buffer.getvalue()
+        return (downsampled, "image/png") if len(downsampled) < len(data) else (data, mime)
+
+    def _load(self, path: str, st: os.stat_result) -> _Asset:
+        with open(path, "rb") as f:
+            data = f.read()
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        data, mime = self._downsample(data, mime)
+        data_uri = f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+        self.loads += 1
+        frankenmetrics.incr("assets.loads")
+        return _Asset(path, st.st_mtime_ns, st.st_size, len(data), data_uri)
+
+    # Data URI for an image file, or "" when it does not exist
+    def data_uri(self, path: str) -> str:
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return ""
+        asset = self._assets.get(path)
+        if asset is not None and asset.mtime_ns == st.st_mtime_ns and asset.size == st.st_size:
+            self.hits += 1
+            frankenmetrics.incr("assets.hits")
+            return asset.data_uri
+        with self._lock:
+            asset = self._load(path, st)
+            self._assets[path] = asset
+        return asset.data_uri
+
+    # Load every image in the given directories up front
+    def preload(self, directories: Iterable[str] = LOGO_DIRS) -> int:
+        count = 0
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if (mimetypes.guess_type(name)[0] or "").startswith("image/"):
+                    self.data_uri(os.path.join(directory, name))
+                    count += 1
+        return count
+
+    def memory_usage(self) -> Dict:
+        assets = list(self._assets.values())
+        return {
+            "assets": len(assets),
+            "encoded_bytes": sum(len(a.data_uri) for a in assets),
+            "image_bytes": sum(a.source_bytes for a in assets),
+            "file_bytes": sum(a.size for a in assets),
+            "loads": self.loads,
+            "hits": self.hits
+        }
+
+@lru_cache(maxsize=None)
+def get_asset_registry() -> AssetRegistry:
+    return AssetRegistry()
+
+# Ready-to-embed data URI for a logo file in logos_dir
+def logo_data_uri(logo: str, logos_dir: str = "franken_logos") -> str:
+    return get_asset_registry().data_uri(os.path.join(logos_dir, logo))
@@ -0,0 +1,220 @@
+from __future__ import annotations
+import os
+import asyncio
+import random
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from frankengen import (
+    seed_generators,
+    generate_bank_statement,
+    render_statement_html,
+    statement_output_name,
+    persist_outputs_async,
+    PDF_OPTIONS,
+    get_wkhtmltopdf_path
+)
+from frankenrender import build_wkhtmltopdf_args
+from frankenbatch import SpecLike, to_batch_spec, validate_component_map
+from frankenidentity import draw_identity, get_identity_pool
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Synthesize a seeded ledger and render its HTML; runs inside an executor worker.
+# Returns (account_holder, ledger, html).
+def _synthesize_html(component_map: Dict[str, str], account_type: str, num_transactions: int, seed: int, account_holder: Optional[str], template_dir: str, as_of: datetime) -> Tuple[str, pd.DataFrame, str]:
+    seed_generators(seed)
+    identity = draw_identity(account_type, account_holder)
+    account_holder = identity["account_holder"]
+    df = generate_bank_statement(num_transactions, account_holder, account_type, start_date=as_of - timedelta(days=30))
+    html = render_statement_html(df, account_holder, component_map, template_dir, account_type, statement_date=as_of, identity=identity)
+    return account_holder, df, html
+
+# Render an existing ledger to HTML; runs inside an executor worker. A seed makes the
+# statement's remaining random fields (identity, summary counts) reproducible.
+def _render_html(df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], template_dir: str, account_type: str, render_kwargs: Dict, seed: Optional[int] = None) -> str:
+    if seed is not None:
+        seed_generators(seed)
+    if "identity" not in render_kwargs:
+        render_kwargs = {**render_kwargs, "identity": draw_identity(account_type, account_holder)}
+    return render_statement_html(df, account_holder, component_map, template_dir, account_type, **render_kwargs)
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+# Statement generation as coroutines: synthesis and templating run in an executor, wkhtmltopdf runs
+# as an asyncio subprocess with at most max_concurrent_pdfs conversions in flight. The cap is a
+# threading semaphore, so it holds for every caller of one generator in the process, whichever event
+# loop they run on (each asyncio.run call, each Streamlit session).
+class AsyncStatementGenerator:
+    def __init__(self, max_concurrent_pdfs: int = 4, executor: Optional[Executor] = None, wkhtmltopdf_path: Optional[str] = None, options: Optional[Dict[str, str]] = None, pdf_timeout: Optional[float] = 120.0):
+        if max_concurrent_pdfs < 1:
+            raise ValueError("max_concurrent_pdfs must be at least 1")
+        self.max_concurrent_pdfs = max_concurrent_pdfs
+        self.pdf_timeout = pdf_timeout
+        self.base_args = build_wkhtmltopdf_args(wkhtmltopdf_path or get_wkhtmltopdf_path(), PDF_OPTIONS if options is None else options)
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pdf_slots = threading.BoundedSemaphore(max_concurrent_pdfs)
+        # Threads that wait for a free slot so the event loop never blocks on the semaphore
+        self._slot_waiters: Optional[ThreadPoolExecutor] = None
+
+    async def __aenter__(self) -> "AsyncStatementGenerator":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # Load (or build) the identity pool before the workers start, so they only ever load the saved file
+            get_identity_pool()
+            self._executor = ProcessPoolExecutor()
+        return self._executor
+
+    # Take a conversion slot, waiting on a helper thread when none is free
+    async def _acquire_pdf_slot(self) -> None:
+        if self._pdf_slots.acquire(blocking=False):
+            return
+        if self._slot_waiters is None:
+            self._slot_waiters = ThreadPoolExecutor(max_workers=self.max_concurrent_pdfs, thread_name_prefix="franken-pdf-slot")
+        waiter = asyncio.get_running_loop().run_in_executor(self._slot_waiters, self._pdf_slots.acquire)
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The helper thread still takes the slot; hand it back as soon as it does
+            waiter.add_done_callback(lambda _: self._pdf_slots.release())
+            raise
+
+    # Convert HTML with wkhtmltopdf; returns the PDF bytes when pdf_path is None, otherwise the path.
+    # The subprocess is killed if the coroutine is cancelled or the timeout expires.
+    async def html_to_pdf(self, html: str, pdf_path: Optional[str] = None) -> bytes | str:
+        await self._acquire_pdf_slot()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.base_args, "-", pdf_path or "-",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(html.encode("utf-8")), self.pdf_timeout)
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                raise TimeoutError(f"wkhtmltopdf did not finish within {self.pdf_timeout}s")
+            except asyncio.CancelledError:
+                await self._kill(process)
+                raise
+        finally:
+            self._pdf_slots.release()
+        if process.returncode != 0:
+            raise RuntimeError(f"wkhtmltopdf exited with non-zero code {process.returncode}. error:\n{stderr.decode('utf-8', 'replace')}")
+        return pdf_path if pdf_path else stdout
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await asyncio.shield(process.wait())
+
+    # Render an existing ledger to HTML and PDF. Returns (html_path, pdf_path).
+    async def render_statement(self, df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], account_type: str, template_dir: str = "f_templates", output_dir: str = "output_statements", output_name: Optional[str] = None, seed: Optional[int] = None, **render_kwargs) -> Tuple[str, str]:
+        loop = asyncio.get_running_loop()
+        html = await loop.run_in_executor(self._get_executor(), _render_html, df, account_holder, component_map, template_dir, account_type, render_kwargs, seed)
+        return await self._write_outputs(html, account_holder, component_map, account_type, output_dir, output_name)
+
+    # Render an existing ledger entirely in memory. Returns (html, pdf_bytes); when output_dir is
+    # given the files are also written on the background writer without delaying the result; failed
+    # writes are collected with frankengen.persist_failures().
+    async def render_statement_bytes(self, df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], account_type: str, template_dir: str = "f_templates", output_dir: Optional[str] = None, output_name: Optional[str] = None, seed: Optional[int] = None, **render_kwargs) -> Tuple[str, bytes]:
+        loop = asyncio.get_running_loop()
+        html = await loop.run_in_executor(self._get_executor(), _render_html, df, account_holder, component_map, template_dir, account_type, render_kwargs, seed)
+        try:
+            pdf = await self.html_to_pdf(html)
+        except (OSError, RuntimeError, TimeoutError) as e:
+            raise Exception(f"PDF generation failed for {component_map} template: {e}")
+        if output_dir is not None:
+            output_name = output_name or statement_output_name(account_holder, component_map, account_type)
+            persist_outputs_async({os.path.join(output_dir, f"{output_name}.html"): html, os.path.join(output_dir, f"{output_name}.pdf"): pdf})
+        return html, pdf
+
+    # Generate one seeded statement end to end. Returns (html_path, pdf_path).
+    async def generate_statement(self, component_map: Dict[str, str], account_type: str, num_transactions: int, seed: Optional[int] = None, account_holder: Optional[str] = None, template_dir: str = "f_templates", output_dir: str = "output_statements", output_name: Optional[str] = None, as_of: Optional[datetime] = None) -> Tuple[str, str]:
+        validate_component_map(component_map)
+        seed = random.getrandbits(63) if seed is None else seed
+        as_of = (as_of or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        loop = asyncio.get_running_loop()
+        account_holder, _, html = await loop.run_in_executor(
+            self._get_executor(), _synthesize_html, component_map, account_type, num_transactions, seed, account_holder, template_dir, as_of
+        )
+        return await self._write_outputs(html, account_holder, component_map, account_type, output_dir, output_name)
+
+    async def _write_outputs(self, html: str, account_holder: str, component_map: Dict[str, str], account_type: str, output_dir: str, output_name: Optional[str]) -> Tuple[str, str]:
+        output_name = output_name or statement_output_name(account_holder, component_map, account_type)
+        os.makedirs(output_dir, exist_ok=True)
+        html_path = os.path.join(output_dir, f"{output_name}.html")
+        pdf_path = os.path.join(output_dir, f"{output_name}.pdf")
+        await asyncio.to_thread(_write_text, html_path, html)
+        try:
+            await self.html_to_pdf(html, pdf_path)
+        except (OSError, RuntimeError, TimeoutError) as e:
+            raise Exception(f"PDF generation failed for {component_map} template: {e}")
+        return html_path, pdf_path
+
+    # Generate many statements concurrently; failures are returned in place when return_exceptions is True
+    async def generate_many(self, specs: Sequence[SpecLike], template_dir: str = "f_templates", output_dir: str = "output_statements", return_exceptions: bool = True) -> List:
+        specs = [to_batch_spec(spec) for spec in specs]
+        return await asyncio.gather(*[
+            self.generate_statement(spec.component_map, spec.account_type, spec.num_transactions, seed=spec.seed,
+                                    account_holder=spec.account_holder, template_dir=template_dir, output_dir=output_dir,
+                                    output_name=f"statement_{index:06d}_{spec.seed}")
+            for index, spec in enumerate(specs)
+        ], return_exceptions=return_exceptions)
+
+    def close(self) -> None:
+        if self._slot_waiters is not None:
+            self._slot_waiters.shutdown(wait=False)
+            self._slot_waiters = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+_default_generator: Optional[AsyncStatementGenerator] = None
+
+# Generator shared by the module-level coroutines, created on first use
+def get_default_generator() -> AsyncStatementGenerator:
+    global _default_generator
+    if _default_generator is None:
+        _default_generator = AsyncStatementGenerator()
+    return _default_generator
+
+async def generate_statement(component_map: Dict[str, str], account_type: str, num_transactions: int, seed: Optional[int] = None, **kwargs) -> Tuple[str, str]:
+    return await get_default_generator().generate_statement(component_map, account_type, num_transactions, seed=seed, **kwargs)
+
+async def render_statement(df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], account_type: str, **kwargs) -> Tuple[str, str]:
+    return await get_default_generator().render_statement(df, account_holder, component_map, account_type, **kwargs)
+
+async def render_statement_bytes(df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], account_type: str, **kwargs) -> Tuple[str, bytes]:
+    return await get_default_generator().render_statement_bytes(df, account_holder, component_map, account_type, **kwargs)
+
+async def generate_many(specs: Sequence[SpecLike], **kwargs) -> List:
+    return await get_default_generator().generate_many(specs, **kwargs)
+
+if __name__ == "__main__":
+    from frankengen import BANK_CONFIG, SUPPORTED_COMPONENTS
+    banks = list(BANK_CONFIG.keys())
+    specs = [
+        ({component: banks[(i + j) % len(banks)] for j, component in enumerate(SUPPORTED_COMPONENTS)}, ["personal", "business"][i % 2], 10, i)
+        for i in range(8)
+    ]
+    results = asyncio.run(generate_many(specs))
+    failed = [r for r in results if isinstance(r, BaseException)]
+    print(f"Generated {len(results) - len(failed)} statements, {len(failed)} failed")
+    for r in failed:
+        print(f"- {type(r).__name__}: {r}")
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from pydantic import BaseModel, Field
+from frankengen import (
+    seed_generators,
+    generate_bank_statement,
+    generate_populated_html_and_pdf,
+    BANK_CONFIG,
+    SUPPORTED_COMPONENTS
+)
+from frankencache import get_output_cache, generate_statement_cached
+from frankenidentity import draw_identity, get_identity_pool
+
+# Pydantic models
+class BatchSpec(BaseModel):
+    component_map: Dict[str, str] = Field(..., description="Bank used for each statement component")
+    account_type: str = Field(..., description="Type of account (personal or business)")
+    num_transactions: int = Field(..., description="Number of transactions in the ledger")
+    seed: int = Field(..., description="Seed for the random sources used by this statement")
+    account_holder: Optional[str] = Field(None, description="Account holder name, generated from the seed if omitted")
+
+class BatchResult(BaseModel):
+    index: int = Field(..., description="Position of the spec in the submitted batch")
+    status: str = Field(..., description="'ok' or 'failed'")
+    seed: int
+    component_map: Dict[str, str]
+    account_type: str
+    num_transactions: int
+    account_holder: Optional[str] = None
+    html_path: Optional[str] = None
+    pdf_path: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    pages: Optional[Tuple[int, int]] = Field(None, description="First and last page (1-based) when pdf_path is a shared bundle")
+    seconds: float = 0.0
+
+SpecLike = Union[BatchSpec, Dict, Tuple]
+
+# Normalize a spec given as a BatchSpec, dict or (component_map, account_type, num_transactions, seed) tuple
+def to_batch_spec(spec: SpecLike) -> BatchSpec:
+    if isinstance(spec, BatchSpec):
+        return spec
+    if isinstance(spec, dict):
+        return BatchSpec(**spec)
+    component_map, account_type, num_transactions, seed = spec
+    return BatchSpec(component_map=component_map, account_type=account_type, num_transactions=num_transactions, seed=seed)
+
+# Validate a component map against the bank configuration
+def validate_component_map(component_map: Dict[str, str]) -> None:
+    for component in SUPPORTED_COMPONENTS:
+        if component not in component_map:
+            raise ValueError(f"Missing component: {component}")
+    for component, bank in component_map.items():
+        if component not in SUPPORTED_COMPONENTS:
+            raise ValueError(f"Unsupported component: {component}")
+        if bank not in BANK_CONFIG:
+            raise ValueError(f"Unsupported bank: {bank}. Supported banks: {list(BANK_CONFIG.keys())}")
+
+# Generate one statement; runs inside a pool worker and never raises
+def generate_one(index: int, spec: BatchSpec, template_dir: str, output_dir: str, cache_dir: Optional[str] = None) -> BatchResult:
+    start = time.perf_counter()
+    result = BatchResult(index=index, status="ok", seed=spec.seed, component_map=spec.component_map,
+                         account_type=spec.account_type, num_transactions=spec.num_transactions)
+    try:
+        validate_component_map(spec.component_map)
+        if cache_dir:
+            result.html_path, result.pdf_path, result.account_holder, result.cached = generate_statement_cached(
+                spec.seed, spec.component_map, spec.account_type, spec.num_transactions, get_output_cache(cache_dir),
+                template_dir=template_dir, output_dir=output_dir, output_name=f"statement_{index:06d}_{spec.seed}",
+                account_holder=spec.account_holder
+            )
+        else:
+            seed_generators(spec.seed)
+            identity = draw_identity(spec.account_type, spec.account_holder)
+            account_holder = identity["account_holder"]
+            result.account_holder = account_holder
+            df = generate_bank_statement(spec.num_transactions, account_holder, spec.account_type)
+            result.html_path, result.pdf_path = generate_populated_html_and_pdf(
+                df=df,
+                account_holder=account_holder,
+                component_map=spec.component_map,
+                template_dir=template_dir,
+                output_dir=output_dir,
+                account_type=spec.account_type,
+                output_name=f"statement_{index:06d}_{spec.seed}",
+                identity=identity
+            )[0]
+    except Exception as e:
+        result.status = "failed"
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = round(time.perf_counter() - start, 4)
+    return result
+
+# Write the manifest as one JSON object per line
+def write_manifest(results: List[BatchResult], manifest_path: str) -> None:
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result.model_dump()) + "\n")
+
+# Generate many statements across a process pool
+def generate_batch(specs: Sequence[SpecLike], workers: int = os.cpu_count() or 1, template_dir: str = "f_templates", output_dir: str = "output_statements", manifest_path: Optional[str] = None, cache_dir: Optional[str] = None) -> List[BatchResult]:
+    if workers < 1:
+        raise ValueError("Number of workers must be at least 1")
+    specs = [to_batch_spec(spec) for spec in specs]
+    os.makedirs(output_dir, exist_ok=True)
+    results: List[Optional[BatchResult]] = [None] * len(specs)
+
+    # Build (or load) the identity pool once here so workers only ever load the saved file
+    get_identity_pool()
+    if workers == 1:
+        for index, spec in enumerate(specs):
+            results[index] = generate_one(index, spec, template_dir, output_dir, cache_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(generate_one, index, spec, template_dir, output_dir, cache_dir): index for index, spec in enumerate(specs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. BrokenProcessPool)
+                    spec = specs[index]
+                    results[index] = BatchResult(index=index, status="failed", seed=spec.seed, component_map=spec.component_map,
+                                                 account_type=spec.account_type, num_transactions=spec.num_transactions,
+                                                 error=f"{type(e).__name__}: {e}")
+
+    if manifest_path:
+        write_manifest(results, manifest_path)
+    return results
+
+if __name__ == "__main__":
+    banks = list(BANK_CONFIG.keys())
+    specs = [
+        ({component: banks[(i + j) % len(banks)] for j, component in enumerate(SUPPORTED_COMPONENTS)}, ["personal", "business"][i % 2], 10, i)
+        for i in range(8)
+    ]
+    results = generate_batch(specs, workers=4, manifest_path=os.path.join("output_statements", "manifest.jsonl"))
+    failed = [r for r in results if r.status != "ok"]
+    print(f"Generated {len(results) - len(failed)} statements, {len(failed)} failed")
+    for r in failed:
+        print(f"- #{r.index}: {r.error}")
@@ -0,0 +1,292 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+from frankengen import (
+    random_account_holder,
+    seed_generators,
+    generate_bank_statement,
+    identify_template_fields,
+    render_statement_html,
+    get_wkhtmltopdf_path,
+    PDF_OPTIONS,
+    BANK_CONFIG,
+    SUPPORTED_COMPONENTS,
+    clear_template_caches
+)
+from concurrent.futures import ThreadPoolExecutor
+from frankenrender import BoundedRenderPool, build_wkhtmltopdf_args, run_wkhtmltopdf
+
+STAGES = ["generate_bank_statement", "identify_template_fields", "render_html", "pdf"]
+DEFAULT_TRANSACTION_COUNTS = [10, 25, 100, 500]
+ACCOUNT_TYPES = ["personal", "business"]
+# Relative slowdown reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+# Entry points whose cold import cost is tracked
+IMPORT_MODULES = ["frankengen", "frankenasync", "frankendataset", "frankenserver"]
+# Ways of converting a batch of statements to PDF compared by the render benchmark
+RENDER_STRATEGIES = ["threads", "pool", "bundle"]
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# Component maps that put every bank in every component slot at least once. "slots" varies one slot
+# at a time around a single-bank map (16 maps for 4 banks); "all" is the full cross product.
+def benchmark_component_maps(mode: str = "slots") -> List[Dict[str, str]]:
+    banks = list(BANK_CONFIG.keys())
+    if mode == "all":
+        from frankendataset import component_combinations
+        return component_combinations(banks, "all")
+    if mode != "slots":
+        raise ValueError(f"Unknown component map mode: {mode}. Use 'slots' or 'all'")
+    maps = []
+    for offset, component in enumerate(SUPPORTED_COMPONENTS):
+        for bank in banks:
+            base = banks[offset % len(banks)]
+            component_map = {c: base for c in SUPPORTED_COMPONENTS}
+            component_map[component] = bank
+            if component_map not in maps:
+                maps.append(component_map)
+    return maps
+
+# True when the configured wkhtmltopdf binary can be executed
+def wkhtmltopdf_available() -> bool:
+    path = get_wkhtmltopdf_path()
+    return bool(shutil.which(path)) or (os.path.isfile(path) and os.access(path, os.X_OK))
+
+# Wall-clock seconds for each of repeat calls, plus the peak traced allocation of one extra call
+def measure(fn: Callable[[], object], repeat: int, memory: bool = True) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        # Traced separately so tracemalloc's overhead never shows up in the timings
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "peak_bytes": peak
+    }
+
+# Time every stage for every component map, account type and transaction count
+def run_benchmarks(component_maps: Sequence[Dict[str, str]], transaction_counts: Sequence[int] = DEFAULT_TRANSACTION_COUNTS, account_types: Sequence[str] = ACCOUNT_TYPES, repeat: int = 5, pdf: bool = True, pdf_repeat: int = 1, template_dir: str = "f_templates", memory: bool = True, progress: bool = True) -> List[Dict]:
+    pdf_args = build_wkhtmltopdf_args(get_wkhtmltopdf_path(), PDF_OPTIONS) if pdf else None
+    results = []
+
+    def record(stage: str, component_map: Optional[Dict[str, str]], account_type: Optional[str], num_transactions: Optional[int], stats: Dict, **extra) -> None:
+        results.append({"stage": stage, "component_map": component_map, "account_type": account_type, "num_transactions": num_transactions, **stats, **extra})
+        if progress:
+            label = "/".join(component_map[c] for c in SUPPORTED_COMPONENTS) if component_map else "-"
+            print(f"{stage:<26} {label:<36} {account_type or '-':<9} {num_transactions or '-':>5}  median {stats['median'] * 1000:9.3f} ms", file=sys.stderr)
+
+    # Ledger synthesis depends only on account type and size
+    for account_type in account_types:
+        for n in transaction_counts:
+            seed_generators(0)
+            record("generate_bank_statement", None, account_type, n,
+                   measure(lambda: generate_bank_statement(n, "BENCH HOLDER", account_type), repeat, memory))
+
+    for component_map in component_maps:
+        # Cold parses the templates' ASTs; warm is served from the introspection caches
+        cold = measure(lambda: (clear_template_caches(), identify_template_fields(component_map, template_dir)), repeat, memory)
+        record("identify_template_fields", component_map, None, None, cold, cache="cold")
+        warm = measure(lambda: identify_template_fields(component_map, template_dir), repeat, memory)
+        record("identify_template_fields", component_map, None, None, warm, cache="warm")
+
+        for account_type in account_types:
+            for n in transaction_counts:
+                seed_generators(0)
+                holder = random_account_holder(account_type)
+                df = generate_bank_statement(n, holder, account_type)
+                render = lambda: render_statement_html(df, holder, component_map, template_dir, account_type, initial_balance=5000.0)
+                record("render_html", component_map, account_type, n, measure(render, repeat, memory))
+                if pdf:
+                    html = render()
+                    stats = measure(lambda: run_wkhtmltopdf(pdf_args, [html]), pdf_repeat, memory=False)
+                    record("pdf", component_map, account_type, n, stats, html_bytes=len(html.encode("utf-8")))
+    return results
+
+# Cumulative microseconds per module from `python -X importtime` output, keyed by module name,
+# with each module's nesting depth (0 for modules imported directly by the -c statement)
+def parse_importtime(stderr: str) -> Dict[str, Dict]:
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = {"cumulative_us": int(match.group(2)), "depth": len(match.group(3)) // 2}
+    return modules
+
+# Cold import of module in a fresh interpreter, repeat times. Timings are the module's cumulative
+# -X importtime cost; the breakdown is the median cost of its heaviest direct imports.
+def measure_import(module: str, repeat: int = 5, top: int = 10) -> Dict:
+    timings, process_timings, breakdown = [], [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+        process_timings.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+        modules = parse_importtime(proc.stderr)
+        timings.append(modules[module]["cumulative_us"] / 1e6)
+        for name, info in modules.items():
+            if info["depth"] == 1:
+                breakdown.setdefault(name, []).append(info["cumulative_us"] / 1e6)
+    heaviest = sorted(((name, statistics.median(values)) for name, values in breakdown.items()), key=lambda item: -item[1])[:top]
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "peak_bytes": None,
+        "process_median": statistics.median(process_timings),
+        "top_imports": dict(heaviest)
+    }
+
+# Startup cost of each entry point module
+def benchmark_imports(modules: Sequence[str] = IMPORT_MODULES, repeat: int = 5, progress: bool = True) -> List[Dict]:
+    results = []
+    for module in modules:
+        stats = measure_import(module, repeat)
+        results.append({"stage": "import", "component_map": None, "account_type": None, "num_transactions": None, "module": module, **stats})
+        if progress:
+            print(f"{'import':<26} {module:<36} {'-':<9} {'-':>5}  median {stats['median'] * 1000:9.3f} ms", file=sys.stderr)
+    return results
+
+# Wall-clock time to convert the same batch of statements to PDF with workers running at once:
+# "threads" runs wkhtmltopdf per document from a ThreadPoolExecutor, "pool" queues each document on a
+# BoundedRenderPool, and "bundle" sends bundle_size documents to each wkhtmltopdf invocation
+def benchmark_render(documents: int = 32, workers: int = 4, bundle_size: int = 8, repeat: int = 3, num_transactions: int = 25, template_dir: str = "f_templates", progress: bool = True) -> List[Dict]:
+    pdf_args = build_wkhtmltopdf_args(get_wkhtmltopdf_path(), PDF_OPTIONS)
+    banks = list(BANK_CONFIG.keys())
+    seed_generators(0)
+    html_docs = []
+    for i in range(documents):
+        component_map = {c: banks[i % len(banks)] for c in SUPPORTED_COMPONENTS}
+        holder = random_account_holder("personal")
+        html_docs.append(render_statement_html(generate_bank_statement(num_transactions, holder, "personal"), holder, component_map, template_dir, "personal", initial_balance=5000.0))
+    bundles = [html_docs[i:i + bundle_size] for i in range(0, documents, bundle_size)]
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor, BoundedRenderPool(workers=workers, max_queue=documents) as pool:
+        runs = {
+            "threads": lambda: list(executor.map(lambda html: run_wkhtmltopdf(pdf_args, [html]), html_docs)),
+            "pool": lambda: [future.result() for future in [pool.submit(html) for html in html_docs]],
+            "bundle": lambda: [future.result() for future in [pool.submit(bundle, outline=True) for bundle in bundles]]
+        }
+        for strategy in RENDER_STRATEGIES:
+            stats = measure(runs[strategy], repeat, memory=False)
+            results.append({"stage": "render_batch", "component_map": None, "account_type": "personal", "num_transactions": num_transactions,
+                            "strategy": strategy, "documents": documents, "workers": workers, "bundle_size": bundle_size, **stats})
+            if progress:
+                print(f"{'render_batch':<26} {strategy:<36} {documents:>4} docs  median {stats['median'] * 1000:9.3f} ms, {documents / stats['median']:.1f} docs/s", file=sys.stderr)
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment_info(pdf: bool) -> Dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "wkhtmltopdf": get_wkhtmltopdf_path() if pdf else None
+    }
+
+def _result_key(result: Dict) -> str:
+    component_map = result.get("component_map")
+    label = "/".join(component_map[c] for c in SUPPORTED_COMPONENTS) if component_map else "-"
+    return f"{result['stage']}|{result.get('module', label)}|{result.get('account_type')}|{result.get('num_transactions')}|{result.get('cache', result.get('strategy', ''))}"
+
+# Median-time ratios of current results against a baseline run, flagging slowdowns past the threshold
+def compare_results(baseline: List[Dict], current: List[Dict], threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    base = {_result_key(r): r for r in baseline}
+    rows = []
+    for result in current:
+        previous = base.get(_result_key(result))
+        if previous is None or not previous["median"]:
+            continue
+        ratio = result["median"] / previous["median"]
+        rows.append({"key": _result_key(result), "baseline": previous["median"], "current": result["median"], "ratio": round(ratio, 4), "regression": ratio > 1 + threshold})
+    return rows
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every stage of statement generation")
+    parser.add_argument("--transactions", default=",".join(map(str, DEFAULT_TRANSACTION_COUNTS)), help="Comma-separated transaction counts to sweep")
+    parser.add_argument("--account-types", default=",".join(ACCOUNT_TYPES))
+    parser.add_argument("--maps", choices=["slots", "all"], default="slots", help="Component maps to cover")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pdf-repeat", type=int, default=1)
+    parser.add_argument("--no-pdf", action="store_true", help="Skip PDF conversion timings")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory measurement")
+    parser.add_argument("--import-modules", default=",".join(IMPORT_MODULES), help="Comma-separated modules whose cold import time is measured")
+    parser.add_argument("--no-imports", action="store_true", help="Skip import time measurement")
+    parser.add_argument("--imports-only", action="store_true", help="Only measure import time")
+    parser.add_argument("--render", action="store_true", help="Also compare batch PDF conversion strategies")
+    parser.add_argument("--render-documents", type=int, default=32)
+    parser.add_argument("--render-workers", type=int, default=4)
+    parser.add_argument("--template-dir", default="f_templates")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    pdf = not args.no_pdf
+    if pdf and not wkhtmltopdf_available():
+        print(f"wkhtmltopdf not found at {get_wkhtmltopdf_path()}; skipping PDF timings", file=sys.stderr)
+        pdf = False
+    results = []
+    if not args.no_imports:
+        results += benchmark_imports([m.strip() for m in args.import_modules.split(",") if m.strip()], args.repeat)
+    if not args.imports_only:
+        results += run_benchmarks(
+            benchmark_component_maps(args.maps),
+            [int(n) for n in args.transactions.split(",")],
+            [t.strip() for t in args.account_types.split(",")],
+            repeat=args.repeat,
+            pdf=pdf,
+            pdf_repeat=args.pdf_repeat,
+            template_dir=args.template_dir,
+            memory=not args.no_memory
+        )
+    if pdf and args.render:
+        results += benchmark_render(args.render_documents, args.render_workers, repeat=args.pdf_repeat, template_dir=args.template_dir)
+    report = {"environment": environment_info(pdf), "results": results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            comparison = compare_results(json.load(f)["results"], results)
+        regressions = [row for row in comparison if row["regression"]]
+        for row in regressions:
+            print(f"REGRESSION {row['key']}: {row['baseline'] * 1000:.3f} ms -> {row['current'] * 1000:.3f} ms (x{row['ratio']})")
+        print(f"Compared {len(comparison)} results against {args.compare}: {len(regressions)} regressions")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import os
+import re
+import io
+import json
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from frankengen import (
+    seed_generators,
+    generate_bank_statement,
+    render_statement_html,
+    release_output_path,
+    PDF_OPTIONS,
+    get_wkhtmltopdf_path
+)
+from frankenrender import build_wkhtmltopdf_args, bundle_wkhtmltopdf_args, run_wkhtmltopdf
+from frankenbatch import BatchSpec, BatchResult, SpecLike, to_batch_spec, validate_component_map
+from frankenidentity import draw_identity
+from pypdf import PdfReader, PdfWriter
+
+DEFAULT_BUNDLE_SIZE = 25
+BUNDLE_MODES = ("split", "index")
+_MARKER = "FRANKENDOC-{:05d}"
+_MARKER_PATTERN = re.compile(r"FRANKENDOC-(\d{5})")
+_TITLE_TAG = re.compile(r"<title[^>]*>.*?</title>", re.IGNORECASE | re.DOTALL)
+_HEAD_TAG = re.compile(r"<head[^>]*>", re.IGNORECASE)
+
+# Title a document with its bundle marker. The title becomes the document's top-level bookmark in the
+# bundle outline and never reaches the page text, so split statements carry no trace of it.
+def mark_document(html: str, index: int) -> str:
+    title = f"<title>{_MARKER.format(index)}</title>"
+    if _TITLE_TAG.search(html):
+        return _TITLE_TAG.sub(title, html, count=1)
+    match = _HEAD_TAG.search(html)
+    if match is None:
+        return f"<head>{title}</head>" + html
+    return html[:match.end()] + title + html[match.end():]
+
+def _reader(pdf: Union[bytes, str]) -> "PdfReader":
+    return PdfReader(io.BytesIO(pdf) if isinstance(pdf, bytes) else pdf)
+
+# (start, stop) page indices, 0-based and stop-exclusive, of each of count marked documents in a bundle,
+# read from the first page of each document's top-level outline entry
+def bundle_page_ranges(pdf: Union[bytes, str], count: int) -> List[Tuple[int, int]]:
+    reader = _reader(pdf)
+    starts: Dict[int, int] = {}
+    for entry in reader.outline:
+        # Nested lists hold the headings below a document's entry
+        if isinstance(entry, list):
+            continue
+        found = _MARKER_PATTERN.fullmatch(str(entry.title).strip())
+        if found:
+            starts.setdefault(int(found.group(1)), reader.get_destination_page_number(entry))
+    missing = [i for i in range(count) if i not in starts]
+    if missing:
+        raise RuntimeError(f"Bundle is missing document markers for {missing}")
+    first_pages = [starts[i] for i in range(count)]
+    if first_pages != sorted(first_pages) or len(set(first_pages)) != count:
+        raise RuntimeError("Bundle document markers are out of order or share a page")
+    return list(zip(first_pages, first_pages[1:] + [len(reader.pages)]))
+
+# Write each page range of a bundle to its own PDF
+def split_bundle(pdf: Union[bytes, str], ranges: Sequence[Tuple[int, int]], pdf_paths: Sequence[str]) -> List[str]:
+    if len(ranges) != len(pdf_paths):
+        raise ValueError("Need exactly one output path per page range")
+    reader = _reader(pdf)
+    for (start, stop), path in zip(ranges, pdf_paths):
+        writer = PdfWriter()
+        for page_number in range(start, stop):
+            writer.add_page(reader.pages[page_number])
+        with open(release_output_path(path), 'wb') as f:
+            writer.write(f)
+    return list(pdf_paths)
+
+# Page-range index of a kept bundle, with 1-based inclusive page numbers
+def write_bundle_index(index_path: str, bundle_path: str, names: Sequence[str], ranges: Sequence[Tuple[int, int]]) -> str:
+    index = {
+        "bundle": os.path.basename(bundle_path),
+        "documents": [{"index": i, "name": name, "first_page": start + 1, "last_page": stop} for i, (name, (start, stop)) in enumerate(zip(names, ranges))]
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    return index_path
+
+# Convert several documents with one wkhtmltopdf call. Returns (bundle bytes or bundle_path, page ranges).
+def render_bundle(html_docs: Sequence[str], bundle_path: Optional[str] = None, render_pool=None, timeout: Optional[float] = None) -> Tuple[Union[bytes, str], List[Tuple[int, int]]]:
+    marked = [mark_document(html, i) for i, html in enumerate(html_docs)]
+    if render_pool is not None:
+        pdf = render_pool.render_bundle(marked, bundle_path)
+    else:
+        pdf = run_wkhtmltopdf(bundle_wkhtmltopdf_args(build_wkhtmltopdf_args(get_wkhtmltopdf_path(), PDF_OPTIONS)), marked, bundle_path, timeout)
+    return pdf, bundle_page_ranges(pdf, len(marked))
+
+# Synthesize and render a batch of statements bundle_size at a time. In "split" mode every statement
+# gets its own PDF cut from the bundle; in "index" mode the bundle is kept with a JSON page-range index
+# and each result points at the bundle with its pages.
+def generate_bundled_batch(specs: Sequence[SpecLike], output_dir: str = "output_statements", bundle_size: int = DEFAULT_BUNDLE_SIZE, mode: str = "split", template_dir: str = "f_templates", render_pool=None) -> List[BatchResult]:
+    if bundle_size < 1:
+        raise ValueError("Bundle size must be at least 1")
+    if mode not in BUNDLE_MODES:
+        raise ValueError(f"Unknown bundle mode: {mode}. Use one of {BUNDLE_MODES}")
+    specs = [to_batch_spec(spec) for spec in specs]
+    os.makedirs(output_dir, exist_ok=True)
+    results: List[BatchResult] = []
+    for first in range(0, len(specs), bundle_size):
+        results.extend(_generate_bundle(specs[first:first + bundle_size], first, output_dir, mode, template_dir, render_pool))
+    return results
+
+def _generate_bundle(specs: List[BatchSpec], first: int, output_dir: str, mode: str, template_dir: str, render_pool) -> List[BatchResult]:
+    start = time.perf_counter()
+    results, docs = [], []
+    for offset, spec in enumerate(specs):
+        index = first + offset
+        result = BatchResult(index=index, status="ok", seed=spec.seed, component_map=spec.component_map,
+                             account_type=spec.account_type, num_transactions=spec.num_transactions)
+        try:
+            validate_component_map(spec.component_map)
+            seed_generators(spec.seed)
+            identity = draw_identity(spec.account_type, spec.account_holder)
+            result.account_holder = identity["account_holder"]
+            df = generate_bank_statement(spec.num_transactions, result.account_holder, spec.account_type)
+            html = render_statement_html(df, result.account_holder, spec.component_map, template_dir, spec.account_type, identity=identity)
+            result.html_path = os.path.join(output_dir, f"statement_{index:06d}_{spec.seed}.html")
+            with open(release_output_path(result.html_path), 'w', encoding='utf-8') as f:
+                f.write(html)
+            docs.append(html)
+        except Exception as e:
+            result.status = "failed"
+            result.error = f"{type(e).__name__}: {e}"
+        results.append(result)
+
+    rendered = [r for r in results if r.status == "ok"]
+    if rendered:
+        bundle_path = os.path.join(output_dir, f"bundle_{first:06d}.pdf")
+        try:
+            _, ranges = render_bundle(docs, bundle_path, render_pool)
+            if mode == "split":
+                split_bundle(bundle_path, ranges, [r.html_path[:-len(".html")] + ".pdf" for r in rendered])
+                os.remove(bundle_path)
+                for r in rendered:
+                    r.pdf_path = r.html_path[:-len(".html")] + ".pdf"
+            else:
+                write_bundle_index(bundle_path[:-len(".pdf")] + ".json", bundle_path, [os.path.basename(r.html_path) for r in rendered], ranges)
+                for r, (page_start, page_stop) in zip(rendered, ranges):
+                    r.pdf_path = bundle_path
+                    r.pages = (page_start + 1, page_stop)
+        except Exception as e:
+            for r in rendered:
+                r.status = "failed"
+                r.error = f"Bundle render failed: {type(e).__name__}: {e}"
+    # Conversion cost is shared, so each statement reports an equal share of the bundle's time
+    seconds = round((time.perf_counter() - start) / len(results), 4)
+    for r in results:
+        r.seconds = seconds
+    return results
+
+if __name__ == "__main__":
+    from frankengen import BANK_CONFIG, SUPPORTED_COMPONENTS
+    banks = list(BANK_CONFIG.keys())
+    specs = [
+        ({component: banks[(i + j) % len(banks)] for j, component in enumerate(SUPPORTED_COMPONENTS)}, ["personal", "business"][i % 2], 10, i)
+        for i in range(50)
+    ]
+    start = time.perf_counter()
+    results = generate_bundled_batch(specs, bundle_size=25)
+    failed = [r for r in results if r.status != "ok"]
+    print(f"Generated {len(results) - len(failed)} statements in {time.perf_counter() - start:.1f}s, {len(failed)} failed")
@@ -0,0 +1,208 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import frankenmetrics
+from frankengen import (
+    seed_generators,
+    generate_bank_statement,
+    generate_populated_html_and_pdf,
+    BANK_CONFIG,
+    SUPPORTED_COMPONENTS
+)
+from frankenidentity import draw_identity, get_identity_pool
+
+LOGOS_DIR = "franken_logos"
+ARTIFACT_KINDS = ("html", "pdf")
+# Fraction of max_bytes the cache is trimmed down to once it overflows
+EVICTION_LOW_WATER = 0.9
+
+# SHA-256 of a file, memoized per (path, mtime, size)
+@lru_cache(maxsize=1024)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def file_sha256(path: str) -> str:
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return _file_sha256(path, st.st_mtime_ns, st.st_size)
+
+# Hash of every file a component map renders with: the base template, the four components and the logo
+def template_version(component_map: Dict[str, str], template_dir: str = "f_templates", logos_dir: str = LOGOS_DIR) -> str:
+    names = ["base_template.html"] + [BANK_CONFIG[component_map[c]]["components"][c] for c in SUPPORTED_COMPONENTS]
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(f"{name}:{file_sha256(os.path.join(template_dir, name))}\n".encode())
+    logo_path = os.path.join(logos_dir, BANK_CONFIG[component_map["bank_front_page"]]["logo"])
+    if os.path.exists(logo_path):
+        digest.update(f"logo:{file_sha256(logo_path)}\n".encode())
+    return digest.hexdigest()
+
+# Content address of one generated statement
+def statement_cache_key(seed: int, component_map: Dict[str, str], account_type: str, num_transactions: int, template_dir: str = "f_templates", **extra) -> str:
+    payload = {
+        "seed": seed,
+        "component_map": {c: component_map[c] for c in SUPPORTED_COMPONENTS},
+        "account_type": account_type,
+        "num_transactions": num_transactions,
+        "templates": template_version(component_map, template_dir),
+        **extra
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+# Size-bounded, content-addressed store of rendered HTML/PDF artifacts with LRU eviction.
+# Entries live in <cache_dir>/<key[:2]>/<key>/statement.{html,pdf}; an entry's mtime is its last use.
+class OutputCache:
+    def __init__(self, cache_dir: str = ".franken_cache", max_bytes: int = 1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._bytes = sum(size for _, size, _ in self._entries())
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _entry_paths(self, key: str) -> Dict[str, str]:
+        entry = self._entry_dir(key)
+        return {kind: os.path.join(entry, f"statement.{kind}") for kind in ARTIFACT_KINDS}
+
+    # (last used, size, path) for every entry on disk
+    def _entries(self) -> list:
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir() or shard.name.startswith("."):
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except FileNotFoundError:
+                    continue
+        return entries
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        paths = self._entry_paths(key)
+        try:
+            os.utime(self._entry_dir(key))
+            hit = all(os.path.exists(p) for p in paths.values())
+        except FileNotFoundError:
+            hit = False
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        frankenmetrics.incr("output_cache.hits" if hit else "output_cache.misses")
+        return paths if hit else None
+
+    # Copy artifacts into the cache; the entry appears atomically
+    def put(self, key: str, artifacts: Dict[str, str]) -> Dict[str, str]:
+        entry = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+        size = 0
+        for kind in ARTIFACT_KINDS:
+            target = os.path.join(staging, f"statement.{kind}")
+            shutil.copyfile(artifacts[kind], target)
+            size += os.path.getsize(target)
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # Another writer stored the same key first; contents are identical
+            shutil.rmtree(staging, ignore_errors=True)
+            return self._entry_paths(key)
+        with self._lock:
+            self._bytes += size
+            overflow = self._bytes > self.max_bytes
+        if overflow:
+            self.evict()
+        return self._entry_paths(key)
+
+    # Drop least recently used entries until the cache is under its low-water mark
+    def evict(self) -> int:
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICTION_LOW_WATER
+            removed = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+            self._bytes = total
+            self.evictions += removed
+        frankenmetrics.incr("output_cache.evictions", removed)
+        return removed
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+# One cache object per directory per process, so workers share counters and the size estimate
+@lru_cache(maxsize=None)
+def get_output_cache(cache_dir: str = ".franken_cache", max_bytes: int = 1 << 30) -> OutputCache:
+    return OutputCache(cache_dir, max_bytes)
+
+# Hard-link (or copy) a cached artifact to its output path
+def _materialize(source: str, target: str) -> str:
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+    return target
+
+# Generate a statement deterministically from its seed, serving repeats from the cache.
+# Returns (html_path, pdf_path, account_holder, cache_hit). The identity is drawn from the seed
+# before the lookup, so a hit reports the same holder the cached statement was rendered with.
+def generate_statement_cached(seed: int, component_map: Dict[str, str], account_type: str, num_transactions: int, cache: OutputCache, template_dir: str = "f_templates", output_dir: str = "output_statements", output_name: Optional[str] = None, as_of: Optional[datetime] = None, account_holder: Optional[str] = None, render_pool=None) -> Tuple[str, str, str, bool]:
+    as_of = (as_of or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    pool = get_identity_pool()
+    key = statement_cache_key(seed, component_map, account_type, num_transactions, template_dir, as_of=as_of.date().isoformat(), account_holder=account_holder, identity_pool=[len(pool), pool.seed])
+    output_name = output_name or f"statement_{key[:16]}"
+    os.makedirs(output_dir, exist_ok=True)
+    html_path = os.path.join(output_dir, f"{output_name}.html")
+    pdf_path = os.path.join(output_dir, f"{output_name}.pdf")
+
+    seed_generators(seed)
+    identity = draw_identity(account_type, account_holder)
+    account_holder = identity["account_holder"]
+    cached = cache.get(key)
+    if cached is not None:
+        return _materialize(cached["html"], html_path), _materialize(cached["pdf"], pdf_path), account_holder, True
+
+    df = generate_bank_statement(num_transactions, account_holder, account_type, start_date=as_of - timedelta(days=30))
+    html_path, pdf_path = generate_populated_html_and_pdf(
+        df=df,
+        account_holder=account_holder,
+        component_map=component_map,
+        template_dir=template_dir,
+        output_dir=output_dir,
+        account_type=account_type,
+        output_name=output_name,
+        render_pool=render_pool,
+        statement_date=as_of,
+        identity=identity
+    )[0]
+    cache.put(key, {"html": html_path, "pdf": pdf_path})
+    return html_path, pdf_path, account_holder, False
@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+import numpy as np
+from pydantic import BaseModel, Field
+from frankengen import (
+    seed_generators,
+    get_rng,
+    generate_ledger,
+    generate_populated_html_and_pdf,
+    compute_statement_totals,
+    get_template_variables,
+    BANK_CONFIG,
+    SUPPORTED_COMPONENTS
+)
+from frankenbatch import validate_component_map
+from frankenidentity import DEFAULT_POOL_PATH, DEFAULT_POOL_SIZE, get_identity_pool
+from frankenexport import EXPORT_FORMATS, DEFAULT_ROW_GROUP_SIZE
+
+# Documents per shard directory
+DEFAULT_SHARD_SIZE = 1000
+# Minimum seconds between progress line updates
+PROGRESS_INTERVAL = 0.5
+# Futures kept in flight per worker, so huge datasets never sit in memory as pending tasks
+INFLIGHT_PER_WORKER = 4
+
+class DocumentSpec(BaseModel):
+    index: int = Field(..., description="Position of the document in the dataset")
+    component_map: Dict[str, str] = Field(..., description="Bank used for each statement component")
+    account_type: str = Field(..., description="Type of account (personal or business)")
+    num_transactions: int = Field(..., description="Number of transactions in the ledger")
+    seed: int = Field(..., description="Seed for the random sources used by this document")
+
+# Every component map over the given banks: "all" mixes banks across components, "single" keeps one bank per map
+def component_combinations(banks: Sequence[str], mode: str = "all") -> List[Dict[str, str]]:
+    for bank in banks:
+        if bank not in BANK_CONFIG:
+            raise ValueError(f"Unsupported bank: {bank}. Supported banks: {list(BANK_CONFIG.keys())}")
+    if mode == "single":
+        return [{component: bank for component in SUPPORTED_COMPONENTS} for bank in banks]
+    if mode == "all":
+        return [dict(zip(SUPPORTED_COMPONENTS, combo)) for combo in itertools.product(banks, repeat=len(SUPPORTED_COMPONENTS))]
+    raise ValueError(f"Unknown combination mode: {mode}. Use 'all' or 'single'")
+
+# Parse "personal=0.7,business=0.3" into normalized weights
+def parse_account_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("personal", "business"):
+            raise ValueError(f"Account type must be 'business' or 'personal', got '{name}'")
+        mix[name] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Account mix weights must sum to more than zero")
+    return {name: weight / total for name, weight in mix.items()}
+
+# Draw n transaction counts from "fixed:N", "uniform:LO:HI" or "poisson:MEAN" (never below 3)
+def sample_transaction_counts(rng: np.random.Generator, spec: str, n: int) -> np.ndarray:
+    kind, *params = spec.split(":")
+    try:
+        values = [float(p) for p in params]
+        if kind == "fixed":
+            counts = np.full(n, int(values[0]))
+        elif kind == "uniform":
+            counts = rng.integers(int(values[0]), int(values[1]) + 1, n)
+        elif kind == "poisson":
+            counts = rng.poisson(values[0], n)
+        else:
+            raise ValueError(f"Unknown distribution: {kind}")
+    except IndexError:
+        raise ValueError(f"Missing parameters for transaction distribution '{spec}'")
+    return np.maximum(counts, 3)
+
+# Deterministic document specs for count documents per component map
+def plan_dataset(combinations: List[Dict[str, str]], count: int, account_mix: Dict[str, float], transactions: str, seed: int) -> List[DocumentSpec]:
+    rng = np.random.default_rng(seed)
+    total = len(combinations) * count
+    account_types = list(account_mix)
+    type_codes = rng.choice(len(account_types), size=total, p=list(account_mix.values()))
+    counts = sample_transaction_counts(rng, transactions, total)
+    seeds = rng.integers(0, 2**63 - 1, total, dtype=np.int64)
+    return [
+        DocumentSpec(index=i, component_map=combinations[i // count], account_type=account_types[type_codes[i]],
+                     num_transactions=int(counts[i]), seed=int(seeds[i]))
+        for i in range(total)
+    ]
+
+def shard_dir(output_dir: str, index: int, shard_size: int) -> str:
+    return os.path.join(output_dir, f"shard_{index // shard_size:05d}")
+
+# Build one document and its manifest record; runs inside a pool worker and never raises
+def build_document(spec: DocumentSpec, output_dir: str, template_dir: str, shard_size: int, as_of: datetime, identity_pool: Optional[str] = DEFAULT_POOL_PATH, identity_pool_size: int = DEFAULT_POOL_SIZE) -> Dict:
+    start = time.perf_counter()
+    directory = shard_dir(output_dir, spec.index, shard_size)
+    record = {**spec.model_dump(), "status": "ok", "html_path": None, "pdf_path": None, "error": None}
+    try:
+        validate_component_map(spec.component_map)
+        os.makedirs(directory, exist_ok=True)
+        seed_generators(spec.seed)
+        rng = get_rng()
+        identity = get_identity_pool(identity_pool, identity_pool_size).draw_one(spec.account_type, rng)
+        account_holder = identity["account_holder"]
+        account_number = identity["account_number"]
+        address = identity["account_holder_address"]
+        initial_balance = round(float(rng.uniform(1000, 20000)), 2)
+        statement_end = as_of
+        statement_start = as_of - timedelta(days=30)
+        ledger = generate_ledger(spec.num_transactions, account_holder, spec.account_type, start_date=statement_start, initial_balance=initial_balance)
+        df = ledger.to_frame()
+        html_path, pdf_path = generate_populated_html_and_pdf(
+            df=df,
+            account_holder=account_holder,
+            component_map=spec.component_map,
+            template_dir=template_dir,
+            output_dir=directory,
+            account_type=spec.account_type,
+            output_name=f"doc_{spec.index:08d}",
+            initial_balance=initial_balance,
+            statement_start=statement_start,
+            statement_end=statement_end,
+            account_number=account_number,
+            account_holder_address=address,
+            statement_date=as_of,
+            identity=identity
+        )[0]
+        record["html_path"] = os.path.relpath(html_path, output_dir)
+        record["pdf_path"] = os.path.relpath(pdf_path, output_dir)
+        record["fields"] = {
+            "account_holder": account_holder[:50],
+            "account_holder_address": address,
+            "account_number": account_number,
+            "account_type": spec.account_type,
+            "statement_start": statement_start.date().isoformat(),
+            "statement_end": statement_end.date().isoformat(),
+            "statement_date": as_of.date().isoformat(),
+            "opening_balance": initial_balance,
+            **{name: round(value, 2) for name, value in compute_statement_totals(df, initial_balance).items()}
+        }
+        if spec.component_map["bank_front_page"] == "citibank":
+            record["fields"].update({name: identity[name] for name in ("client_number", "date_of_birth", "customer_iban")})
+        record["template_fields"] = sorted(get_template_variables(spec.component_map, template_dir))
+        record["ledger"] = ledger.to_records()
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+# Manifest record for a document whose worker died before it could report back
+def failed_record(spec: DocumentSpec, error: BaseException) -> Dict:
+    return {**spec.model_dump(), "status": "failed", "html_path": None, "pdf_path": None, "error": f"{type(error).__name__}: {error}", "seconds": 0.0}
+
+# Build documents across a process pool, yielding manifest records as they finish
+def build_dataset(specs: Sequence[DocumentSpec], output_dir: str, template_dir: str = "f_templates", workers: int = os.cpu_count() or 1, shard_size: int = DEFAULT_SHARD_SIZE, as_of: Optional[datetime] = None, identity_pool: Optional[str] = DEFAULT_POOL_PATH, identity_pool_size: int = DEFAULT_POOL_SIZE) -> Iterator[Dict]:
+    if workers < 1:
+        raise ValueError("Number of workers must be at least 1")
+    as_of = (as_of or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    os.makedirs(output_dir, exist_ok=True)
+    # Build (or load) the identity pool once here so workers only ever load the saved file
+    get_identity_pool(identity_pool, identity_pool_size)
+    document_args = (output_dir, template_dir, shard_size, as_of, identity_pool, identity_pool_size)
+    if workers == 1:
+        for spec in specs:
+            yield build_document(spec, *document_args)
+        return
+    pending_specs = iter(specs)
+    # Documents that were in flight when a worker died, rerun one at a time to find the one that crashed it
+    suspects: List[DocumentSpec] = []
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        in_flight: Dict[Future, DocumentSpec] = {}
+        while True:
+            if suspects:
+                if not in_flight:
+                    spec = suspects.pop(0)
+                    in_flight[executor.submit(build_document, spec, *document_args)] = spec
+            else:
+                while len(in_flight) < workers * INFLIGHT_PER_WORKER:
+                    spec = next(pending_specs, None)
+                    if spec is None:
+                        break
+                    in_flight[executor.submit(build_document, spec, *document_args)] = spec
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            crashed = []
+            for future in done:
+                spec = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool as e:
+                    crashed.append((spec, e))
+                except Exception as e:
+                    yield failed_record(spec, e)
+            if not crashed:
+                continue
+            # A dead worker breaks the whole pool: keep what finished, start a fresh pool for the rest
+            for future, spec in in_flight.items():
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    yield future.result()
+                else:
+                    crashed.append((spec, crashed[0][1]))
+            in_flight.clear()
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = ProcessPoolExecutor(max_workers=workers)
+            if len(crashed) == 1:
+                yield failed_record(*crashed[0])
+            else:
+                suspects.extend(spec for spec, _ in crashed)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+# Single-line progress with throughput and ETA
+def _report_progress(done: int, failed: int, total: int, started: float, stream=sys.stderr) -> None:
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0.0
+    eta = (total - done) / rate if rate else 0.0
+    stream.write(f"\r[{done}/{total}] {rate:.1f} docs/s, {failed} failed, elapsed {elapsed:.0f}s, eta {eta:.0f}s ")
+    stream.flush()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="frankengen", description="Build a synthetic bank statement dataset")
+    parser.add_argument("--count", type=int, default=1, help="Documents per component combination")
+    parser.add_argument("--banks", default=",".join(BANK_CONFIG.keys()), help="Comma-separated banks to combine")
+    parser.add_argument("--combinations", choices=["all", "single"], default="all", help="Mix banks across components, or one bank per document")
+    parser.add_argument("--account-mix", default="personal=0.5,business=0.5", help="Account type weights, e.g. personal=0.7,business=0.3")
+    parser.add_argument("--transactions", default="uniform:10:25", help="Transaction count distribution: fixed:N, uniform:LO:HI or poisson:MEAN")
+    parser.add_argument("--seed", type=int, default=0, help="Dataset seed; the same seed rebuilds the same dataset")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-dir", default="dataset")
+    parser.add_argument("--template-dir", default="f_templates")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Documents per shard directory")
+    parser.add_argument("--as-of", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), default=None, help="Statement date (YYYY-MM-DD), default today")
+    parser.add_argument("--identity-pool", default=DEFAULT_POOL_PATH, help="Identity pool file, built on first use")
+    parser.add_argument("--identity-pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Identities pre-generated with Faker")
+    parser.add_argument("--manifest", default=None, help="Manifest path, default <output-dir>/manifest.jsonl")
+    parser.add_argument("--export", choices=EXPORT_FORMATS, default=None, help="Also stream ledgers and statement metadata into columnar files")
+    parser.add_argument("--export-dir", default=None, help="Export directory, default <output-dir>/export")
+    parser.add_argument("--partition-by", default="account_type", help="Comma-separated export partition columns: account_type and/or component names")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE, help="Ledger rows per export row group")
+    parser.add_argument("--quiet", action="store_true", help="Do not print progress")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.count < 1 or args.shard_size < 1:
+        raise SystemExit("--count and --shard-size must be at least 1")
+    try:
+        combinations = component_combinations([b.strip() for b in args.banks.split(",") if b.strip()], args.combinations)
+        specs = plan_dataset(combinations, args.count, parse_account_mix(args.account_mix), args.transactions, args.seed)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    manifest_path = args.manifest or os.path.join(args.output_dir, "manifest.jsonl")
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    exporter = None
+    if args.export:
+        # Loaded only when exporting, so plain dataset builds never import pyarrow
+        from frankenexport import LedgerExporter
+        try:
+            exporter = LedgerExporter(args.export_dir or os.path.join(args.output_dir, "export"), args.export,
+                                      [c.strip() for c in args.partition_by.split(",") if c.strip()], args.row_group_size)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    started = time.perf_counter()
+    last_report = 0.0
+    done = failed = 0
+    try:
+        with open(manifest_path, 'w', encoding='utf-8') as manifest:
+            for record in build_dataset(specs, args.output_dir, args.template_dir, args.workers, args.shard_size, args.as_of, args.identity_pool, args.identity_pool_size):
+                manifest.write(json.dumps(record) + "\n")
+                if exporter is not None:
+                    exporter.add_record(record)
+                done += 1
+                failed += record["status"] != "ok"
+                if not args.quiet and (done == len(specs) or time.perf_counter() - last_report >= PROGRESS_INTERVAL):
+                    _report_progress(done, failed, len(specs), started)
+                    last_report = time.perf_counter()
+    finally:
+        if exporter is not None:
+            exporter.close()
+    if not args.quiet:
+        sys.stderr.write("\n")
+    print(f"Built {done - failed} documents ({failed} failed) in {time.perf_counter() - started:.1f}s; manifest: {manifest_path}")
+    if exporter is not None:
+        print(f"Exported {exporter.rows} ledger rows from {exporter.statements} statements to {exporter.output_dir}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import os
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from frankengen import Ledger, statement_totals, lazy_import, SUPPORTED_COMPONENTS
+
+# pyarrow is only loaded once an export file is opened, so importing this module (e.g. for the CLI's
+# format choices) stays cheap
+pa = lazy_import("pyarrow")
+
+EXPORT_FORMATS = ("parquet", "arrow", "jsonl")
+FILE_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "jsonl": ".jsonl"}
+# pyarrow.dataset format names for reading an export back
+DATASET_FORMATS = {"parquet": "parquet", "arrow": "ipc", "jsonl": "json"}
+TABLES = ("ledgers", "statements")
+# Ledger rows buffered per partition before they are written as one row group
+DEFAULT_ROW_GROUP_SIZE = 65536
+DEFAULT_PARTITION_BY = ("account_type",)
+PARTITION_COLUMNS = ("account_type",) + tuple(SUPPORTED_COMPONENTS)
+LEDGER_COLUMNS = ("statement_id", "date", "description", "category", "type", "amount", "balance", "transaction_id")
+STATEMENT_COLUMNS = ("statement_id", "seed", "account_holder", "account_number", "account_type", *SUPPORTED_COMPONENTS,
+                     "statement_start", "statement_end", "num_transactions", "opening_balance", "deposits_total",
+                     "withdrawals_total", "service_fee", "closing_balance")
+
+@lru_cache(maxsize=None)
+def _schemas() -> Dict[str, "pa.Schema"]:
+    return {
+        "ledgers": pa.schema([
+            ("statement_id", pa.int64()), ("date", pa.string()), ("description", pa.string()), ("category", pa.string()),
+            ("type", pa.string()), ("amount", pa.float64()), ("balance", pa.float64()), ("transaction_id", pa.string())
+        ]),
+        "statements": pa.schema([
+            ("statement_id", pa.int64()), ("seed", pa.int64()), ("account_holder", pa.string()), ("account_number", pa.string()),
+            ("account_type", pa.string()), *[(component, pa.string()) for component in SUPPORTED_COMPONENTS],
+            ("statement_start", pa.date32()), ("statement_end", pa.date32()), ("num_transactions", pa.int32()),
+            ("opening_balance", pa.float64()), ("deposits_total", pa.float64()), ("withdrawals_total", pa.float64()),
+            ("service_fee", pa.float64()), ("closing_balance", pa.float64())
+        ])
+    }
+
+def _as_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+# One output file of one table in one partition. The file is written under a hidden temporary name and
+# moved into place on close, so dataset scans never pick up a half-written file.
+class _TableFile:
+    def __init__(self, directory: str, export_format: str, columns: Sequence[str], schema=None, compression: Optional[str] = None):
+        os.makedirs(directory, exist_ok=True)
+        extension = FILE_EXTENSIONS[export_format]
+        number = 0
+        while os.path.exists(os.path.join(directory, f"part-{number:05d}{extension}")) or os.path.exists(os.path.join(directory, f".part-{number:05d}{extension}.tmp")):
+            number += 1
+        self.path = os.path.join(directory, f"part-{number:05d}{extension}")
+        self.tmp_path = os.path.join(directory, f".part-{number:05d}{extension}.tmp")
+        self.export_format = export_format
+        self.columns = tuple(columns)
+        self.schema = schema
+        self._sink = None
+        if export_format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression=compression)
+        elif export_format == "arrow":
+            self._sink = pa.OSFile(self.tmp_path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, schema)
+        else:
+            self._writer = open(self.tmp_path, 'w', encoding='utf-8')
+
+    # Write columns (equal-length sequences keyed by column name) as one row group / record batch
+    def write(self, columns: Dict[str, Sequence]) -> None:
+        if self.export_format == "jsonl":
+            values = [columns[name].tolist() if isinstance(columns[name], np.ndarray) else list(columns[name]) for name in self.columns]
+            for row in zip(*values):
+                self._writer.write(json.dumps(dict(zip(self.columns, row)), default=str) + "\n")
+            return
+        batch = pa.record_batch([pa.array(columns[field.name], type=field.type) for field in self.schema], schema=self.schema)
+        if self.export_format == "parquet":
+            self._writer.write_batch(batch, row_group_size=max(batch.num_rows, 1))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self) -> str:
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+# Buffered rows and open files of one partition
+class _Partition:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.ledger_columns: Dict[str, List[np.ndarray]] = {name: [] for name in LEDGER_COLUMNS}
+        self.statements: List[Dict] = []
+        self.rows = 0
+        self.files: Dict[str, _TableFile] = {}
+
+# Streams generated ledgers and their statement metadata into partitioned Parquet, Arrow IPC or JSONL
+# files. Rows go to <output_dir>/ledgers/ and one row per statement to <output_dir>/statements/, both
+# split into hive-style <column>=<value> directories by partition_by; partition columns live only in the
+# directory names. Each partition buffers up to row_group_size ledger rows, then writes them as one row
+# group, so memory stays bounded however many statements are exported. Read an export back with
+# open_export(). One exporter per output directory at a time.
+class LedgerExporter:
+    def __init__(self, output_dir: str, export_format: str = "parquet", partition_by: Sequence[str] = DEFAULT_PARTITION_BY, row_group_size: int = DEFAULT_ROW_GROUP_SIZE, compression: Optional[str] = "zstd"):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}. Use one of {EXPORT_FORMATS}")
+        unknown = [column for column in partition_by if column not in PARTITION_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot partition by {unknown}. Partition columns: {PARTITION_COLUMNS}")
+        if row_group_size < 1:
+            raise ValueError("Row group size must be at least 1")
+        self.output_dir = output_dir
+        self.export_format = export_format
+        self.partition_by = tuple(partition_by)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.statements = 0
+        self.rows = 0
+        self.row_groups = 0
+        self.files: List[str] = []
+        self._partitions: Dict[tuple, _Partition] = {}
+        self._next_id = 0
+
+    def __enter__(self) -> "LedgerExporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Export one ledger. Balances and totals are derived from the ledger itself; returns the statement ID.
+    def add(self, ledger: Ledger, component_map: Dict[str, str], statement_start: Optional[datetime] = None, statement_end: Optional[datetime] = None, account_number: Optional[str] = None, seed: Optional[int] = None, statement_id: Optional[int] = None) -> int:
+        n = len(ledger)
+        opening_balance = round(float(ledger.balances[0] - ledger.amounts[0]), 2) if n else 0.0
+        columns = {
+            "date": np.asarray(ledger.date_labels, dtype=object)[ledger.day_codes],
+            "description": np.asarray(ledger.description_labels, dtype=object)[ledger.description_codes],
+            "category": np.asarray(ledger.category_labels, dtype=object)[ledger.category_codes],
+            "type": np.asarray(Ledger.TYPE_LABELS, dtype=object)[ledger.type_codes],
+            "amount": ledger.amounts,
+            "balance": ledger.balances,
+            "transaction_id": ledger.transaction_ids
+        }
+        statement = {
+            "seed": seed, "account_holder": ledger.account_holder, "account_number": account_number, "account_type": ledger.account_type,
+            **{component: component_map[component] for component in SUPPORTED_COMPONENTS},
+            "statement_start": statement_start, "statement_end": statement_end, "num_transactions": n,
+            **self._totals(statement_totals(ledger.amounts, opening_balance), opening_balance)
+        }
+        return self._append(statement, columns, n, statement_id)
+
+    # Export one successful frankendataset manifest record; failed records are skipped and return None
+    def add_record(self, record: Dict) -> Optional[int]:
+        if record.get("status") != "ok":
+            return None
+        rows = record["ledger"]
+        fields = record["fields"]
+        columns = {
+            "date": [row["Date"] for row in rows], "description": [row["Description"] for row in rows],
+            "category": [row["Category"] for row in rows], "type": [row["Type"] for row in rows],
+            "amount": np.array([row["Amount"] for row in rows], dtype=np.float64),
+            "balance": np.array([row["Balance"] for row in rows], dtype=np.float64),
+            "transaction_id": [row["Transaction ID"] for row in rows]
+        }
+        statement = {
+            "seed": record.get("seed"), "account_holder": fields["account_holder"], "account_number": fields.get("account_number"),
+            "account_type": record["account_type"], **{component: record["component_map"][component] for component in SUPPORTED_COMPONENTS},
+            "statement_start": fields.get("statement_start"), "statement_end": fields.get("statement_end"), "num_transactions": len(rows),
+            **self._totals(fields, fields["opening_balance"])
+        }
+        return self._append(statement, columns, len(rows), record.get("index"))
+
+    @staticmethod
+    def _totals(totals: Dict[str, float], opening_balance: float) -> Dict[str, float]:
+        return {
+            "opening_balance": opening_balance, "deposits_total": round(totals["deposits_total"], 2),
+            "withdrawals_total": round(totals["withdrawals_total"], 2), "service_fee": float(totals["service_fee"]),
+            "closing_balance": totals["ending_balance"]
+        }
+
+    def _append(self, statement: Dict, columns: Dict[str, Sequence], n: int, statement_id: Optional[int]) -> int:
+        if statement_id is None:
+            statement_id = self._next_id
+        self._next_id = max(self._next_id, statement_id + 1)
+        statement = {"statement_id": statement_id, **statement}
+        statement["statement_start"] = _as_date(statement["statement_start"])
+        statement["statement_end"] = _as_date(statement["statement_end"])
+        partition = self._partition(statement)
+        partition.ledger_columns["statement_id"].append(np.full(n, statement_id, dtype=np.int64))
+        for name, values in columns.items():
+            partition.ledger_columns[name].append(np.asarray(values, dtype=np.float64 if name in ("amount", "balance") else object))
+        partition.statements.append(statement)
+        partition.rows += n
+        self.statements += 1
+        self.rows += n
+        if partition.rows >= self.row_group_size:
+            self._flush(partition)
+        return statement_id
+
+    def _partition(self, statement: Dict) -> _Partition:
+        key = tuple(str(statement[column]) for column in self.partition_by)
+        partition = self._partitions.get(key)
+        if partition is None:
+            for column, value in zip(self.partition_by, key):
+                if not value or os.sep in value or value.startswith("."):
+                    raise ValueError(f"Cannot use {value!r} as a {column} partition value")
+            directory = os.path.join(*[f"{column}={value}" for column, value in zip(self.partition_by, key)]) if key else ""
+            partition = self._partitions[key] = _Partition(directory)
+        return partition
+
+    def _file(self, partition: _Partition, table: str) -> _TableFile:
+        table_file = partition.files.get(table)
+        if table_file is None:
+            schema = None
+            if self.export_format != "jsonl":
+                schema = _schemas()[table]
+                schema = pa.schema([field for field in schema if field.name not in self.partition_by])
+            columns = LEDGER_COLUMNS if table == "ledgers" else [name for name in STATEMENT_COLUMNS if name not in self.partition_by]
+            table_file = partition.files[table] = _TableFile(os.path.join(self.output_dir, table, partition.directory), self.export_format, columns, schema, self.compression)
+        return table_file
+
+    # Write a partition's buffered rows as one row group per table
+    def _flush(self, partition: _Partition) -> None:
+        if not partition.statements:
+            return
+        ledger_columns = {name: np.concatenate(chunks) for name, chunks in partition.ledger_columns.items()}
+        self._file(partition, "ledgers").write(ledger_columns)
+        statement_file = self._file(partition, "statements")
+        statement_file.write({name: [statement[name] for statement in partition.statements] for name in statement_file.columns})
+        partition.ledger_columns = {name: [] for name in LEDGER_COLUMNS}
+        partition.statements = []
+        partition.rows = 0
+        self.row_groups += 1
+
+    def flush(self) -> None:
+        for partition in self._partitions.values():
+            self._flush(partition)
+
+    # Flush everything and move the finished files into place; returns their paths
+    def close(self) -> List[str]:
+        self.flush()
+        for partition in self._partitions.values():
+            for table_file in partition.files.values():
+                self.files.append(table_file.close())
+            partition.files = {}
+        self._partitions = {}
+        return self.files
+
+# Open one table of an export as a pyarrow dataset with its hive partitions as columns. Scans read only
+# the columns and partitions they ask for; Arrow IPC files can be read without decoding.
+def open_export(output_dir: str, table: str = "ledgers", export_format: str = "parquet"):
+    if table not in TABLES:
+        raise ValueError(f"Unknown export table: {table}. Use one of {TABLES}")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}. Use one of {EXPORT_FORMATS}")
+    import pyarrow.dataset as ds
+    return ds.dataset(os.path.join(output_dir, table), format=DATASET_FORMATS[export_format], partitioning="hive")
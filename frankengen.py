@@ -1,18 +1,82 @@
+from __future__ import annotations
 import os
-import re
+import sys
 import base64
 import json
-from faker import Faker
+import importlib.util
+import weakref
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 import random
-import pandas as pd
+from functools import lru_cache, partial
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
 from pydantic import BaseModel, Field
-from typing import List, Dict
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
-import pdfkit
+from typing import TYPE_CHECKING, List, Dict, Iterator
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, TemplateNotFound, meta, nodes
+from frankenassets import logo_data_uri
+import frankenmetrics
 
-# Initialize Faker
-fake = Faker()
+if TYPE_CHECKING:
+    from faker import Faker
+
+# Import a module on first attribute access instead of at import time. Already-imported modules are returned as is.
+def lazy_import(name: str):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# pandas and pdfkit are only loaded once a ledger is built or a PDF is rendered
+pd = lazy_import("pandas")
+pdfkit = lazy_import("pdfkit")
+
+# Faker is built on first use; seeds set before then are applied when it is built
+_fake: Faker | None = None
+_fake_seed: int | None = None
+
+def get_faker() -> Faker:
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker()
+        if _fake_seed is not None:
+            _fake.seed_instance(_fake_seed)
+    return _fake
+
+# Random holder name: a company for business accounts, a person otherwise
+def random_account_holder(account_type: str) -> str:
+    return get_faker().company().upper() if account_type == "business" else get_faker().name().upper()
+
+# `from frankengen import fake` keeps working and builds the shared Faker on access
+def __getattr__(name: str):
+    if name == "fake":
+        return get_faker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# NumPy generator used for vectorized ledger synthesis
+_rng = np.random.default_rng()
+
+def get_rng() -> np.random.Generator:
+    return _rng
+
+# Seed the random sources used during generation
+def seed_generators(seed: int) -> None:
+    global _rng, _fake_seed
+    random.seed(seed)
+    _fake_seed = seed
+    if _fake is not None:
+        _fake.seed_instance(seed)
+    _rng = np.random.default_rng(seed)
 
 # Bank configuration with flat filenames
 BANK_CONFIG = {
@@ -54,6 +118,97 @@ BANK_CONFIG = {
     }
 }
 
+# wkhtmltopdf options shared by every PDF conversion
+PDF_OPTIONS = {
+    "enable-local-file-access": "",
+    "page-size": "Letter",
+    "margin-top": "0.8in",
+    "margin-right": "0.9in",
+    "margin-bottom": "0.8in",
+    "margin-left": "0.9in",
+    "encoding": "UTF-8",
+    "disable-javascript": "",
+    "image-dpi": "300",
+    "enable-forms": "",
+    "no-outline": "",
+    "print-media-type": "",
+    "minimum-font-size": "10"
+}
+
+# Resolve the wkhtmltopdf binary
+def get_wkhtmltopdf_path() -> str:
+    return os.environ.get("WKHTMLTOPDF_PATH", "/usr/bin/wkhtmltopdf")
+
+# Build the pdfkit configuration once per wkhtmltopdf binary
+@lru_cache(maxsize=None)
+def _pdfkit_configuration(wkhtmltopdf_path: str) -> "pdfkit.configuration.Configuration":
+    return pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
+
+def get_pdfkit_configuration() -> "pdfkit.configuration.Configuration":
+    return _pdfkit_configuration(get_wkhtmltopdf_path())
+
+# On-disk bytecode cache shared by every template environment so fresh processes start warm.
+# Entries are keyed by template file and source checksum, so edited templates never hit stale bytecode.
+@lru_cache(maxsize=None)
+def _bytecode_cache(cache_dir: str | None) -> FileSystemBytecodeCache:
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    return FileSystemBytecodeCache(cache_dir)
+
+# One compiled template environment per template directory.
+# auto_reload re-checks each template's mtime on lookup and recompiles only the ones that changed.
+@lru_cache(maxsize=None)
+def _template_env(template_dir: str) -> Environment:
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        bytecode_cache=_bytecode_cache(os.environ.get("FRANKEN_JINJA_CACHE_DIR")),
+        auto_reload=True,
+        cache_size=-1
+    )
+
+def get_template_env(template_dir: str = "f_templates") -> Environment:
+    return _template_env(os.path.abspath(template_dir))
+
+# Template directories watched for changes (see frankentemplates), each with a change counter per template.
+# Watched environments skip the per-lookup mtime check; the watcher reports edits through template_changed().
+_watched_template_dirs: Dict[str, Dict[str, int]] = {}
+
+def watch_template_dir(template_dir: str, watched: bool = True) -> None:
+    template_dir = os.path.abspath(template_dir)
+    if watched:
+        _watched_template_dirs.setdefault(template_dir, {})
+    else:
+        _watched_template_dirs.pop(template_dir, None)
+    _template_env(template_dir).auto_reload = not watched
+
+# Watcher events only reach the process that owns the observer, so forked children (process pool
+# workers) go back to checking template mtimes on every lookup
+def _unwatch_template_dirs_after_fork() -> None:
+    for template_dir in list(_watched_template_dirs):
+        _template_env(template_dir).auto_reload = True
+    _watched_template_dirs.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_unwatch_template_dirs_after_fork)
+
+# Drop one template's compiled code and bump its change counter, so only that template is
+# recompiled and re-introspected; every other template stays cached
+def template_changed(template_dir: str, template_name: str) -> None:
+    template_dir = os.path.abspath(template_dir)
+    versions = _watched_template_dirs.get(template_dir)
+    if versions is not None:
+        versions[template_name] = versions.get(template_name, 0) + 1
+    env = _template_env(template_dir)
+    env.cache.pop((weakref.ref(env.loader), template_name), None)
+
+# Version of a template for cache keys: its change counter when watched, otherwise its mtime
+def template_revision(template_dir: str, template_name: str) -> int:
+    template_dir = os.path.abspath(template_dir)
+    versions = _watched_template_dirs.get(template_dir)
+    if versions is not None:
+        return versions.get(template_name, 0)
+    return os.stat(os.path.join(template_dir, template_name)).st_mtime_ns
+
 # Pydantic models
 class FieldDefinition(BaseModel):
     name: str = Field(..., description="Field name")
@@ -63,8 +218,10 @@ class FieldDefinition(BaseModel):
 class StatementFields(BaseModel):
     fields: List[FieldDefinition] = Field(..., description="List of mutable and immutable fields")
 
+DESCRIPTION_MAX_LENGTH = 35
+
 class Transaction(BaseModel):
-    description: str = Field(..., max_length=35, description="Transaction description")
+    description: str = Field(..., max_length=DESCRIPTION_MAX_LENGTH, description="Transaction description")
     category: str
     amount: float
     account_type: str = Field(..., description="Type of account (personal or business)")
@@ -105,6 +262,10 @@ PERSONAL_CATEGORIES = {
     ]
 }
 
+WITHDRAWAL_TYPES = ["electronic", "check", "other"]
+_ID_LETTERS = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)
+_ID_DIGITS = np.frombuffer(b"0123456789", dtype=np.uint8)
+
 # Generate category lists
 def generate_category_lists(account_type: str) -> tuple[List[str], List[str]]:
     categories = BUSINESS_CATEGORIES if account_type == "business" else PERSONAL_CATEGORIES
@@ -125,197 +286,442 @@ def generate_transaction_description(amount: float, category: str, account_type:
     transaction = Transaction(description=description, category=category, amount=amount, account_type=account_type, type=transaction_type)
     return transaction.model_dump()
 
-# Generate synthetic bank statement
-def generate_bank_statement(num_transactions: int, account_holder: str, account_type: str) -> pd.DataFrame:
+# Category/description lookup tables used for vectorized sampling.
+# Each side ("gain"/"loss") maps to (first category code, category count, description offsets, description counts).
+@lru_cache(maxsize=None)
+def _category_tables(account_type: str) -> tuple[Dict[str, tuple], List[str], List[str], np.ndarray]:
+    categories = BUSINESS_CATEGORIES if account_type == "business" else PERSONAL_CATEGORIES
+    category_labels, description_labels, description_codes = [], [], []
+    sides = {}
+    for kind in ("gain", "loss"):
+        first_category = len(category_labels)
+        offsets, counts = [], []
+        for name, descriptions in categories[kind]:
+            category_labels.append(name)
+            offsets.append(len(description_codes))
+            counts.append(len(descriptions))
+            for description in descriptions:
+                description = ' '.join(word.capitalize() for word in description[:35].split())
+                if description not in description_labels:
+                    description_labels.append(description)
+                description_codes.append(description_labels.index(description))
+        sides[kind] = (first_category, len(category_labels) - first_category, np.array(offsets), np.array(counts))
+    return sides, category_labels, description_labels, np.array(description_codes)
+
+# Draw n (category, description) codes from one side of the category table
+def _sample_categories(rng: np.random.Generator, table: tuple, n: int) -> tuple[np.ndarray, np.ndarray]:
+    category_offset, category_count, offsets, counts = table
+    category_idx = rng.integers(0, category_count, n)
+    description_idx = offsets[category_idx] + (rng.random(n) * counts[category_idx]).astype(np.int64)
+    return category_offset + category_idx, description_idx
+
+# BBAN-style transaction IDs: 4 letters + 6 digits (the shape of fake.bban()[:10]) + zero-padded sequence number
+def _transaction_ids(rng: np.random.Generator, n: int) -> np.ndarray:
+    width = max(4, len(str(n - 1)))
+    chars = np.empty((n, 10 + width), dtype=np.uint8)
+    chars[:, :4] = _ID_LETTERS[rng.integers(0, len(_ID_LETTERS), (n, 4))]
+    chars[:, 4:10] = _ID_DIGITS[rng.integers(0, len(_ID_DIGITS), (n, 6))]
+    sequence = np.arange(n)
+    for position in range(width):
+        chars[:, 10 + width - 1 - position] = _ID_DIGITS[(sequence // 10 ** position) % 10]
+    return chars.view(f"S{10 + width}").ravel().astype(str)
+
+# Smallest signed code dtype pandas uses for a categorical with this many labels
+def _code_dtype(num_labels: int) -> type:
+    if num_labels < np.iinfo(np.int8).max:
+        return np.int8
+    if num_labels < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+# Struct-of-arrays ledger: one typed NumPy column per transaction field instead of a Transaction model
+# per row. Categorical fields are stored as codes into label tuples, so a ledger of n rows costs a few
+# bytes per row plus its ID strings. validate() checks the Transaction constraints once for the whole
+# batch, and to_frame() hands the columns to pandas without copying them.
+class Ledger:
+    __slots__ = ("day_codes", "date_labels", "description_codes", "description_labels", "category_codes", "category_labels",
+                 "amounts", "type_codes", "balances", "transaction_ids", "account_holder", "account_type")
+    TYPE_LABELS = ("deposit",) + tuple(WITHDRAWAL_TYPES)
+
+    def __init__(self, day_codes: np.ndarray, date_labels: List[str], description_codes: np.ndarray, description_labels: List[str], category_codes: np.ndarray, category_labels: List[str], amounts: np.ndarray, type_codes: np.ndarray, balances: np.ndarray, transaction_ids: np.ndarray, account_holder: str, account_type: str):
+        self.date_labels = tuple(date_labels)
+        self.description_labels = tuple(description_labels)
+        self.category_labels = tuple(category_labels)
+        self.day_codes = np.asarray(day_codes, dtype=_code_dtype(len(self.date_labels)))
+        self.description_codes = np.asarray(description_codes, dtype=_code_dtype(len(self.description_labels)))
+        self.category_codes = np.asarray(category_codes, dtype=_code_dtype(len(self.category_labels)))
+        self.type_codes = np.asarray(type_codes, dtype=np.int8)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.balances = np.asarray(balances, dtype=np.float64)
+        self.transaction_ids = np.asarray(transaction_ids, dtype=str)
+        self.account_holder = account_holder
+        self.account_type = account_type
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    # Check every row against the Transaction constraints in one vectorized pass; raises ValueError
+    def validate(self) -> "Ledger":
+        n = len(self)
+        columns = ("day_codes", "description_codes", "category_codes", "type_codes", "balances", "transaction_ids")
+        uneven = [name for name in columns if len(getattr(self, name)) != n]
+        if uneven:
+            raise ValueError(f"Ledger columns {uneven} do not have {n} rows")
+        if self.account_type not in ["business", "personal"]:
+            raise ValueError("Account type must be 'business' or 'personal'")
+        too_long = [label for label in self.description_labels if len(label) > DESCRIPTION_MAX_LENGTH]
+        if too_long:
+            raise ValueError(f"Descriptions longer than {DESCRIPTION_MAX_LENGTH} characters: {too_long}")
+        for codes, labels, name in ((self.day_codes, self.date_labels, "date"), (self.description_codes, self.description_labels, "description"),
+                                    (self.category_codes, self.category_labels, "category"), (self.type_codes, self.TYPE_LABELS, "type")):
+            if n and (codes.min() < 0 or codes.max() >= len(labels)):
+                raise ValueError(f"Ledger has {name} codes outside its {len(labels)} labels")
+        if not np.isfinite(self.amounts).all():
+            raise ValueError("Ledger amounts must be finite")
+        # Deposits are credits and every withdrawal type is a debit
+        if ((self.type_codes == 0) != (self.amounts > 0)).any():
+            raise ValueError("Ledger transaction types do not match the sign of their amounts")
+        return self
+
+    # DataFrame view of the ledger. Categorical codes and float columns are handed over without
+    # copying; only the transaction IDs are converted to pandas strings.
+    def to_frame(self) -> pd.DataFrame:
+        n = len(self)
+        return pd.DataFrame({
+            "Date": pd.Categorical.from_codes(self.day_codes, self.date_labels),
+            "Description": pd.Categorical.from_codes(self.description_codes, self.description_labels),
+            "Category": pd.Categorical.from_codes(self.category_codes, self.category_labels),
+            "Amount": self.amounts,
+            "Type": pd.Categorical.from_codes(self.type_codes, self.TYPE_LABELS),
+            "Balance": self.balances,
+            "Account Holder": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [self.account_holder]),
+            "Account Type": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), [self.account_type.capitalize()]),
+            "Transaction ID": self.transaction_ids
+        }, copy=False)
+
+    # Plain row dicts keyed like the DataFrame columns, with money rounded to cents
+    def to_records(self) -> List[Dict]:
+        columns = {
+            "Date": np.array(self.date_labels, dtype=object)[self.day_codes].tolist(),
+            "Description": np.array(self.description_labels, dtype=object)[self.description_codes].tolist(),
+            "Category": np.array(self.category_labels, dtype=object)[self.category_codes].tolist(),
+            "Amount": self.amounts.round(2).tolist(),
+            "Type": np.array(self.TYPE_LABELS, dtype=object)[self.type_codes].tolist(),
+            "Balance": self.balances.round(2).tolist(),
+            "Transaction ID": self.transaction_ids.tolist()
+        }
+        account_type = self.account_type.capitalize()
+        return [
+            {"Date": date, "Description": description, "Category": category, "Amount": amount, "Type": kind, "Balance": balance,
+             "Account Holder": self.account_holder, "Account Type": account_type, "Transaction ID": transaction_id}
+            for date, description, category, amount, kind, balance, transaction_id in zip(*columns.values())
+        ]
+
+    def memory_usage(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ("day_codes", "description_codes", "category_codes", "type_codes", "amounts", "balances", "transaction_ids"))
+
+# Generate a synthetic ledger as typed columns
+def generate_ledger(num_transactions: int, account_holder: str, account_type: str, rng: np.random.Generator | None = None, start_date: datetime | None = None, num_days: int = 31, initial_balance: float | None = None) -> Ledger:
     if account_type not in ["business", "personal"]:
         raise ValueError("Account type must be 'business' or 'personal'")
-    if not (3 <= num_transactions <= 25):
-        raise ValueError("Number of transactions must be between 3 and 25")
-    
-    loss_categories, gain_categories = generate_category_lists(account_type)
-    start_date = datetime.now() - timedelta(days=30)
-    dates = [start_date + timedelta(days=random.randint(0, 30)) for _ in range(num_transactions)]
-    
-    transactions = []
-    min_deposits = max(1, num_transactions // 3)
-    min_withdrawals = max(1, num_transactions // 3)
-    deposit_count = 0
-    withdrawal_count = 0
-    
-    for _ in range(num_transactions):
-        if deposit_count < min_deposits:
-            is_gain = True
-        elif withdrawal_count < min_withdrawals:
-            is_gain = False
-        else:
-            is_gain = random.choice([True, False])
-        
-        category = random.choice(gain_categories if is_gain else loss_categories)
-        amount = round(random.uniform(50, 1000), 2) if is_gain else round(random.uniform(-500, -10), 2)
-        transaction = generate_transaction_description(amount, category, account_type)
-        transactions.append(transaction)
-        
-        if is_gain:
-            deposit_count += 1
-        else:
-            withdrawal_count += 1
-    
-    data = {
-        "Date": [d.strftime("%m/%d") for d in dates],
-        "Description": [t["description"] for t in transactions],
-        "Category": [t["category"] for t in transactions],
-        "Amount": [t["amount"] for t in transactions],
-        "Type": [t["type"] for t in transactions],
-        "Balance": [0.0] * num_transactions,
-        "Account Holder": [account_holder] * num_transactions,
-        "Account Type": [account_type.capitalize()] * num_transactions,
-        "Transaction ID": [(fake.bban()[:10] + str(i).zfill(4)) for i in range(num_transactions)]
-    }
-    df = pd.DataFrame(data)
-    df = df.sort_values("Date")
-    initial_balance = round(random.uniform(1000, 20000), 2)
-    df["Balance"] = initial_balance + df["Amount"].cumsum()
-    return df
+    if num_transactions < 3:
+        raise ValueError("Number of transactions must be at least 3")
+    rng = rng or get_rng()
+    n = num_transactions
 
-# Identify mutable and immutable fields
-def identify_template_fields(component_map: Dict[str, str], templates_dir: str = "f_templates") -> StatementFields:
-    env = Environment(loader=FileSystemLoader(templates_dir))
-    supported_components = ["bank_front_page", "account_summary", "bank_balance", "disclosures"]
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=num_days - 1)
+    date_labels = [(start_date + timedelta(days=d)).strftime("%m/%d") for d in range(num_days)]
+    day_offsets = rng.integers(0, num_days, n)
+
+    # Ensure a mix of deposits and withdrawals
+    min_deposits = max(1, n // 3)
+    min_withdrawals = max(1, n // 3)
+    is_gain = rng.random(n) < 0.5
+    is_gain[:min_deposits] = True
+    is_gain[min_deposits:min_deposits + min_withdrawals] = False
+
+    sides, category_labels, description_labels, description_codes = _category_tables(account_type)
+    category_codes = np.empty(n, dtype=np.int64)
+    description_idx = np.empty(n, dtype=np.int64)
+    for kind, mask in (("gain", is_gain), ("loss", ~is_gain)):
+        category_codes[mask], description_idx[mask] = _sample_categories(rng, sides[kind], int(mask.sum()))
+    amounts = np.where(is_gain, rng.uniform(50, 1000, n), rng.uniform(-500, -10, n)).round(2)
+    # 0 = deposit, 1..3 = WITHDRAWAL_TYPES
+    type_codes = np.where(is_gain, 0, rng.integers(1, len(WITHDRAWAL_TYPES) + 1, n))
+    transaction_ids = _transaction_ids(rng, n)
+
+    order = np.argsort(day_offsets, kind="stable")
+    amounts = amounts[order]
+    if initial_balance is None:
+        initial_balance = round(float(rng.uniform(1000, 20000)), 2)
+    ledger = Ledger(
+        day_codes=day_offsets[order],
+        date_labels=date_labels,
+        description_codes=description_codes[description_idx[order]],
+        description_labels=description_labels,
+        category_codes=category_codes[order],
+        category_labels=category_labels,
+        amounts=amounts,
+        type_codes=type_codes[order],
+        balances=initial_balance + np.cumsum(amounts),
+        transaction_ids=transaction_ids[order],
+        account_holder=account_holder,
+        account_type=account_type
+    )
+    return ledger.validate()
+
+# Generate synthetic bank statement
+def generate_bank_statement(num_transactions: int, account_holder: str, account_type: str, rng: np.random.Generator | None = None, start_date: datetime | None = None, num_days: int = 31, initial_balance: float | None = None) -> pd.DataFrame:
+    return generate_ledger(num_transactions, account_holder, account_type, rng, start_date, num_days, initial_balance).to_frame()
+
+SUPPORTED_COMPONENTS = ["bank_front_page", "account_summary", "bank_balance", "disclosures"]
+
+# Field definitions reported for the placeholders a component map uses
+DEFAULT_FIELDS = [
+    FieldDefinition(name="account_holder", is_mutable=True, description="Name of the account holder"),
+    FieldDefinition(name="account_holder_address", is_mutable=True, description="Address of the account holder"),
+    FieldDefinition(name="account_number", is_mutable=True, description="Account number"),
+    FieldDefinition(name="statement_period", is_mutable=True, description="Statement date range"),
+    FieldDefinition(name="statement_date", is_mutable=True, description="Date the statement was created"),
+    FieldDefinition(name="transactions", is_mutable=True, description="List of transaction details"),
+    FieldDefinition(name="opening_balance", is_mutable=True, description="Opening balance"),
+    FieldDefinition(name="total_debit", is_mutable=True, description="Total debit amount"),
+    FieldDefinition(name="total_credit", is_mutable=True, description="Total credit amount"),
+    FieldDefinition(name="total", is_mutable=True, description="Total balance"),
+    FieldDefinition(name="logo_path", is_mutable=True, description="Path to the bank logo"),
+    FieldDefinition(name="important_info", is_mutable=True, description="Important account information"),
+    FieldDefinition(name="summary", is_mutable=True, description="Summary of account details"),
+    FieldDefinition(name="daily_balances", is_mutable=True, description="Daily balance details"),
+    FieldDefinition(name="deposits", is_mutable=True, description="Deposit transactions"),
+    FieldDefinition(name="withdrawals", is_mutable=True, description="Withdrawal transactions"),
+    FieldDefinition(name="balance_map", is_mutable=True, description="Mapping of dates to balances"),
+    FieldDefinition(name="statement_start", is_mutable=True, description="Start date of the statement period"),
+    FieldDefinition(name="statement_end", is_mutable=True, description="End date of the statement period"),
+    FieldDefinition(name="day_delta", is_mutable=True, description="Delta between days for balance calculation"),
+    FieldDefinition(name="client_number", is_mutable=True, description="Client number"),
+    FieldDefinition(name="date_of_birth", is_mutable=True, description="Date of birth"),
+    FieldDefinition(name="customer_account_number", is_mutable=True, description="Customer account number"),
+    FieldDefinition(name="customer_iban", is_mutable=True, description="Customer IBAN"),
+    FieldDefinition(name="customer_bank_name", is_mutable=True, description="Customer bank name"),
+    FieldDefinition(name="show_fee_waiver", is_mutable=True, description="Whether the service fee was waived"),
+    FieldDefinition(name="account_type", is_mutable=True, description="Type of account"),
+    FieldDefinition(name="bank_name", is_mutable=False, description="Name of the bank"),
+    FieldDefinition(name="bank_address", is_mutable=False, description="Bank address"),
+    FieldDefinition(name="customer_service", is_mutable=False, description="Customer service contact information"),
+    FieldDefinition(name="footnotes", is_mutable=False, description="Footnotes and disclosures")
+]
+IMMUTABLE_FIELD_NAMES = ["bank_name", "bank_address", "customer_service", "footnotes"]
+
+# Context variables a template reads, from its parsed AST. Attribute and constant-key
+# lookups on those variables are reported as dotted paths (e.g. summary.deposits_total).
+@lru_cache(maxsize=256)
+def _template_variables(templates_dir: str, template_name: str, version: int) -> frozenset[str]:
+    env = get_template_env(templates_dir)
+    try:
+        source, _, _ = env.loader.get_source(env, template_name)
+    except TemplateNotFound:
+        raise FileNotFoundError(f"Template {template_name} not found in {templates_dir}")
+    ast = env.parse(source)
+    names = meta.find_undeclared_variables(ast)
+    variables = set(names)
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        if isinstance(node.node, nodes.Name) and node.node.name in names:
+            if isinstance(node, nodes.Getattr):
+                variables.add(f"{node.node.name}.{node.attr}")
+            elif isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+                variables.add(f"{node.node.name}.{node.arg.value}")
+    return frozenset(variables)
+
+# Variables referenced by one bank's component template, memoized per template version
+def get_component_variables(bank: str, component: str, templates_dir: str = "f_templates") -> frozenset[str]:
+    if component not in SUPPORTED_COMPONENTS:
+        raise ValueError(f"Unsupported component: {component}")
+    if bank not in BANK_CONFIG:
+        raise ValueError(f"Unsupported bank: {bank}. Supported banks: {list(BANK_CONFIG.keys())}")
+    template_name = BANK_CONFIG[bank]["components"][component]
+    templates_dir = os.path.abspath(templates_dir)
+    try:
+        version = template_revision(templates_dir, template_name)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Template {template_name} not found in {templates_dir}")
+    return _template_variables(templates_dir, template_name, version)
+
+# Variables referenced by all components of a component map
+def get_template_variables(component_map: Dict[str, str], templates_dir: str = "f_templates") -> set[str]:
     for component in component_map.keys():
-        if component not in supported_components:
+        if component not in SUPPORTED_COMPONENTS:
             raise ValueError(f"Unsupported component: {component}")
-    placeholders = set()
-    for component in supported_components:
-        bank = component_map[component]
-        template_name = BANK_CONFIG[bank]["components"][component]
-        try:
-            template = env.get_template(template_name)
-            placeholders.update(re.findall(r'\{\{([^{}]+)\}\}', template.render()))
-        except TemplateNotFound:
-            raise FileNotFoundError(f"Template {template_name} not found in {templates_dir}")
-    placeholders = [p.strip() for p in placeholders]
-    
-    default_fields = [
-        FieldDefinition(name="account_holder", is_mutable=True, description="Name of the account holder"),
-        FieldDefinition(name="account_holder_address", is_mutable=True, description="Address of the account holder"),
-        FieldDefinition(name="account_number", is_mutable=True, description="Account number"),
-        FieldDefinition(name="statement_period", is_mutable=True, description="Statement date range"),
-        FieldDefinition(name="statement_date", is_mutable=True, description="Date the statement was created"),
-        FieldDefinition(name="transactions", is_mutable=True, description="List of transaction details"),
-        FieldDefinition(name="opening_balance", is_mutable=True, description="Opening balance"),
-        FieldDefinition(name="total_debit", is_mutable=True, description="Total debit amount"),
-        FieldDefinition(name="total_credit", is_mutable=True, description="Total credit amount"),
-        FieldDefinition(name="total", is_mutable=True, description="Total balance"),
-        FieldDefinition(name="logo_path", is_mutable=True, description="Path to the bank logo"),
-        FieldDefinition(name="important_info", is_mutable=True, description="Important account information"),
-        FieldDefinition(name="summary", is_mutable=True, description="Summary of account details"),
-        FieldDefinition(name="daily_balances", is_mutable=True, description="Daily balance details"),
-        FieldDefinition(name="deposits", is_mutable=True, description="Deposit transactions"),
-        FieldDefinition(name="withdrawals", is_mutable=True, description="Withdrawal transactions"),
-        FieldDefinition(name="balance_map", is_mutable=True, description="Mapping of dates to balances"),
-        FieldDefinition(name="statement_start", is_mutable=True, description="Start date of the statement period"),
-        FieldDefinition(name="statement_end", is_mutable=True, description="End date of the statement period"),
-        FieldDefinition(name="day_delta", is_mutable=True, description="Delta between days for balance calculation"),
-        FieldDefinition(name="client_number", is_mutable=True, description="Client number"),
-        FieldDefinition(name="date_of_birth", is_mutable=True, description="Date of birth"),
-        FieldDefinition(name="customer_account_number", is_mutable=True, description="Customer account number"),
-        FieldDefinition(name="customer_iban", is_mutable=True, description="Customer IBAN"),
-        FieldDefinition(name="customer_bank_name", is_mutable=True, description="Customer bank name"),
-        FieldDefinition(name="show_fee_waiver", is_mutable=True, description="Whether the service fee was waived"),
-        FieldDefinition(name="account_type", is_mutable=True, description="Type of account"),
-        FieldDefinition(name="bank_name", is_mutable=False, description="Name of the bank"),
-        FieldDefinition(name="bank_address", is_mutable=False, description="Bank address"),
-        FieldDefinition(name="customer_service", is_mutable=False, description="Customer service contact information"),
-        FieldDefinition(name="footnotes", is_mutable=False, description="Footnotes and disclosures")
-    ]
-    statement_fields = StatementFields(fields=[f for f in default_fields if f.name in placeholders or f.name in ["bank_name", "bank_address", "customer_service", "footnotes"]])
-    
-    log_path = os.path.join("output_statements", "template_fields.json")
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    with open(log_path, 'w', encoding='utf-8') as f:
-        json.dump(statement_fields.model_dump(), f, indent=2)
-    
+    variables = set()
+    for component in SUPPORTED_COMPONENTS:
+        variables.update(get_component_variables(component_map[component], component, templates_dir))
+    return variables
+
+@lru_cache(maxsize=256)
+def _statement_fields(names: frozenset[str]) -> tuple[FieldDefinition, ...]:
+    return tuple(f for f in DEFAULT_FIELDS if f.name in names or f.name in IMMUTABLE_FIELD_NAMES)
+
+# Forget every memoized template introspection result, e.g. to time field identification cold
+def clear_template_caches() -> None:
+    _template_variables.cache_clear()
+    _statement_fields.cache_clear()
+
+# Identify mutable and immutable fields
+def identify_template_fields(component_map: Dict[str, str], templates_dir: str = "f_templates", log_path: str | None = None) -> StatementFields:
+    names = frozenset(v.split(".", 1)[0] for v in get_template_variables(component_map, templates_dir))
+    statement_fields = StatementFields(fields=list(_statement_fields(names)))
+    if log_path:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        with open(log_path, 'w', encoding='utf-8') as f:
+            json.dump(statement_fields.model_dump(), f, indent=2)
     return statement_fields
 
-# Generate populated HTML and PDF
-def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], template_dir: str = "f_templates", output_dir: str = "output_statements", account_type: str = Field(..., description="Type of account (personal or business)")) -> list:
-    env = Environment(loader=FileSystemLoader(template_dir))
-    try:
-        template = env.get_template("base_template.html")
-    except TemplateNotFound:
-        raise FileNotFoundError(f"Base template 'base_template.html' not found in {template_dir}")
-    
-    initial_balance = round(random.uniform(1000, 20000), 2)
-    deposits_total = sum(x for x in df['Amount'] if x > 0)
-    withdrawals_total = abs(sum(x for x in df['Amount'] if x < 0))
+# End-of-day balances for every calendar day of the statement (balance_map, keyed by ISO datetime)
+# and for every day with transactions (daily_balances), from one grouped cumulative sum over the ledger
+def compute_daily_balances(df: pd.DataFrame, initial_balance: float, statement_start: datetime, statement_end: datetime, currency: str = "$") -> tuple[Dict[str, str], List[Dict[str, str]]]:
+    daily_amounts = df.groupby("Date", observed=True, sort=False)["Amount"].sum()
+    labels = daily_amounts.index.astype(str)
+    start = pd.Timestamp(statement_start).normalize()
+    end = pd.Timestamp(statement_end).normalize()
+    days = pd.to_datetime(labels + f"/{start.year}", format="%m/%d/%Y")
+    # Dates earlier than the statement start belong to the following year
+    days = days.where(days >= start, days + pd.DateOffset(years=1))
+    daily_amounts = pd.Series(daily_amounts.to_numpy(), index=days)
+
+    calendar = pd.date_range(start, end, freq="D")
+    balances = initial_balance + daily_amounts.reindex(calendar, fill_value=0.0).cumsum().to_numpy()
+    balance_map = {(statement_start + timedelta(days=i)).isoformat(): f"{currency}{balance:,.2f}" for i, balance in enumerate(balances)}
+
+    positions = calendar.get_indexer(days)
+    order = np.argsort(positions, kind="stable")
+    daily_balances = [
+        {"date": labels[i], "amount": f"{currency}{balances[positions[i]]:,.2f}"}
+        for i in order if positions[i] >= 0
+    ]
+    return balance_map, daily_balances
+
+# Deposit/withdrawal totals, monthly service fee and closing balance for a ledger
+def compute_statement_totals(df: pd.DataFrame, initial_balance: float) -> Dict[str, float]:
+    return statement_totals(df["Amount"].to_numpy(dtype=float), initial_balance)
+
+# The same totals from a bare amounts column (e.g. Ledger.amounts)
+def statement_totals(amounts: np.ndarray, initial_balance: float) -> Dict[str, float]:
+    amounts = np.asarray(amounts, dtype=float)
+    deposits_total = float(amounts[amounts > 0].sum())
+    withdrawals_total = float(abs(amounts[amounts < 0].sum()))
     ending_balance = initial_balance + deposits_total - withdrawals_total
     service_fee = 25 if ending_balance < 5000 else 0
     if service_fee:
         withdrawals_total += service_fee
         ending_balance -= service_fee
+    return {"deposits_total": deposits_total, "withdrawals_total": withdrawals_total, "service_fee": service_fee, "ending_balance": round(ending_balance, 2)}
+
+# Format a whole column of amounts as currency strings
+def format_currency(values: np.ndarray, currency: str = "$") -> List[str]:
+    return [f"{currency}{value:,.2f}" for value in np.asarray(values, dtype=float).tolist()]
+
+# Row dicts for the transaction, deposit and withdrawal tables, formatted column by column.
+# The "citibank" layout keeps ledger order with debit/credit/balance columns; the US layout is
+# sorted by date with deposits_credits/withdrawals_debits/ending_balance columns.
+def format_transaction_rows(df: pd.DataFrame, initial_balance: float, currency: str = "$", layout: str = "us") -> Dict[str, List[Dict[str, str]]]:
+    if layout != "citibank":
+        df = df.sort_values("Date", kind="stable")
+    dates = df["Date"].astype(str).tolist()
+    descriptions = df["Description"].astype(str).tolist()
+    types = df["Type"].astype(str).tolist()
+    amounts = df["Amount"].to_numpy(dtype=float)
+    is_credit = amounts > 0
+    formatted = np.array(format_currency(np.abs(amounts), currency), dtype=object)
+    credits = np.where(is_credit, formatted, "").tolist()
+    debits = np.where(amounts < 0, formatted, "").tolist()
+    balances = format_currency(initial_balance + np.cumsum(amounts), currency)
+
+    if layout == "citibank":
+        transactions = [
+            {"date": date, "description": description, "debit": debit, "credit": credit, "balance": balance, "type": kind}
+            for date, description, debit, credit, balance, kind in zip(dates, descriptions, debits, credits, balances, types)
+        ]
+    else:
+        transactions = [
+            {"date": date, "description": description, "deposits_credits": credit, "withdrawals_debits": debit, "ending_balance": balance, "type": kind}
+            for date, description, credit, debit, balance, kind in zip(dates, descriptions, credits, debits, balances, types)
+        ]
+    amount_strings = formatted.tolist()
+    deposits = [
+        {"date": dates[i], "description": descriptions[i], "amount": amount_strings[i], "type": types[i]}
+        for i in np.flatnonzero(is_credit).tolist()
+    ]
+    withdrawals = [
+        {"date": dates[i], "description": descriptions[i], "amount": amount_strings[i], "type": types[i]}
+        for i in np.flatnonzero(~is_credit).tolist()
+    ]
+    return {"transactions": transactions, "deposits": deposits, "withdrawals": withdrawals}
+
+# Default file name (without extension) for a statement's outputs
+def statement_output_name(account_holder: str, component_map: Dict[str, str], account_type: str) -> str:
+    template_name_base = "_".join([f"{k}_{v}" for k, v in component_map.items()])
+    return f"bank_statement_{account_type.upper()}_{account_holder[:50].replace(' ', '_')}_{template_name_base}"
+
+# Date of a "%m/%d" ledger label within the year ending at as_of, so a ledger that starts in December
+# and ends in January gets two different years
+def _ledger_date(label: str, as_of: datetime) -> datetime:
+    date = datetime.strptime(f"{as_of.year}/{label}", "%Y/%m/%d")
+    return date.replace(year=as_of.year - 1) if date.date() > as_of.date() else date
+
+# Render the full statement HTML for a ledger without writing anything to disk
+def render_statement_html(df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], template_dir: str = "f_templates", account_type: str = "personal", initial_balance: float | None = None, statement_start: datetime | None = None, statement_end: datetime | None = None, account_number: str | None = None, account_holder_address: str | None = None, statement_date: datetime | None = None, identity: Dict[str, str] | None = None) -> str:
+    timer = frankenmetrics.stage_timer("statement")
+    env = get_template_env(template_dir)
+    try:
+        template = env.get_template("base_template.html")
+    except TemplateNotFound:
+        raise FileNotFoundError(f"Base template 'base_template.html' not found in {template_dir}")
+    timer.mark("template_load")
     
-    min_date = datetime.strptime(min(df['Date']), "%m/%d").replace(year=2025)
-    max_date = datetime.strptime(max(df['Date']), "%m/%d").replace(year=2025)
-    statement_date = datetime.now().strftime("%B %d, %Y at %I:%M %p %Z")
+    if initial_balance is None:
+        initial_balance = round(random.uniform(1000, 20000), 2)
+    amounts = df["Amount"].to_numpy(dtype=float)
+    totals = compute_statement_totals(df, initial_balance)
+    deposits_total = totals["deposits_total"]
+    withdrawals_total = totals["withdrawals_total"]
+    service_fee = totals["service_fee"]
+    ending_balance = totals["ending_balance"]
     
-    address = fake.address().replace('\n', '<br>')[:100]
+    # Ledger dates carry no year: read them against the statement period, or the statement date when there is none
+    as_of = statement_end or (statement_start + timedelta(days=364) if statement_start else None) or statement_date or datetime.now()
+    min_date = statement_start or _ledger_date(df['Date'].iloc[0], as_of)
+    max_date = statement_end or _ledger_date(df['Date'].iloc[-1], as_of)
+    statement_date = (statement_date or datetime.now()).strftime("%B %d, %Y at %I:%M %p %Z")
+    timer.mark("totals")
+    
+    # Identity fields come from the explicit arguments, then a pre-drawn identity (see frankenidentity), then Faker
+    identity = identity or {}
+    address = account_holder_address or identity.get("account_holder_address") or get_faker().address().replace('\n', '<br>')[:100]
     account_holder = account_holder[:50]
-    account_number = fake.bban()[:15]
+    account_number = account_number or identity.get("account_number") or get_faker().bban()[:15]
     
     info_bank = component_map["bank_front_page"]
     important_info = generate_important_info(info_bank, account_type)
+    timer.mark("faker")
     
-    transactions = []
     deposits = []
     withdrawals = []
-    running_balance = initial_balance
     if component_map["bank_balance"] == "citibank":
-        total_debit = abs(sum(x for x in df['Amount'] if x < 0))
-        total_credit = sum(x for x in df['Amount'] if x > 0)
-        for _, row in df.iterrows():
-            amount = row['Amount']
-            debit = f"£{abs(amount):,.2f}" if amount < 0 else ""
-            credit = f"£{amount:,.2f}" if amount > 0 else ""
-            running_balance += amount
-            transactions.append({
-                "date": row["Date"], "description": row["Description"], "debit": debit, "credit": credit,
-                "balance": f"£{running_balance:,.2f}", "type": row["Type"]
-            })
+        total_debit = float(abs(amounts[amounts < 0].sum()))
+        total_credit = deposits_total
+        transactions = format_transaction_rows(df, initial_balance, currency="£", layout="citibank")["transactions"]
     else:
-        for _, row in df.sort_values("Date").iterrows():
-            amount = row['Amount']
-            transaction_type = row['Type']
-            deposits_credits = f"${amount:,.2f}" if amount > 0 else ""
-            withdrawals_debits = f"${abs(amount):,.2f}" if amount < 0 else ""
-            running_balance += amount
-            transactions.append({
-                "date": row["Date"], "description": row["Description"], "deposits_credits": deposits_credits,
-                "withdrawals_debits": withdrawals_debits, "ending_balance": f"${running_balance:,.2f}", "type": transaction_type
-            })
-            if amount > 0:
-                deposits.append({"date": row["Date"], "description": row["Description"], "amount": f"${amount:,.2f}", "type": transaction_type})
-            else:
-                withdrawals.append({"date": row["Date"], "description": row["Description"], "amount": f"${abs(amount):,.2f}", "type": transaction_type})
+        rows = format_transaction_rows(df, initial_balance)
+        transactions, deposits, withdrawals = rows["transactions"], rows["deposits"], rows["withdrawals"]
         if service_fee:
             withdrawals.append({"date": max_date.strftime("%m/%d"), "description": "Monthly Service Fee", "amount": f"${service_fee:,.2f}", "type": "other"})
-            running_balance -= service_fee
+    timer.mark("transaction_rows")
     
-    daily_balances = [{"date": row["Date"], "amount": f"${row['Balance']:,.2f}"} for _, row in df.drop_duplicates(subset="Date").iterrows()]
-    balance_map = {}
-    if component_map["bank_balance"] in ["chase", "wellsfargo"]:
-        running_balance = initial_balance
-        statement_start = min_date
-        statement_end = max_date
-        day_delta = timedelta(days=1)
-        current_date = statement_start
-        while current_date <= statement_end:
-            iso_date = current_date.isoformat()
-            daily_transactions = df[df["Date"] == current_date.strftime("%m/%d")]
-            if not daily_transactions.empty:
-                daily_amount = daily_transactions["Amount"].sum()
-                running_balance += daily_amount
-            balance_map[iso_date] = f"${running_balance:,.2f}"
-            current_date += day_delta
+    statement_start = min_date
+    statement_end = max_date
+    day_delta = timedelta(days=1)
+    balance_map, daily_balances = compute_daily_balances(df, initial_balance, statement_start, statement_end)
+    timer.mark("balance_map")
     
     summary = {
         "beginning_balance": f"${initial_balance:,.2f}",
@@ -337,12 +743,12 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, compo
         "overdraft_protection2": f"{component_map['account_summary'].capitalize()} Credit Line XXXX5678" if random.choice([True, False]) else "",
         "overdraft_status": "Opted-In" if random.choice([True, False]) else "Opted-Out"
     }
-        
+    timer.mark("summary")
 
     template_data = {
         "account_holder": account_holder, "account_holder_address": address, "account_number": account_number,
         "statement_period": f"{min_date.strftime('%B %d')} through {max_date.strftime('%B %d')}", "statement_date": statement_date,
-        "logo_path": os.path.join("franken_logos", BANK_CONFIG[component_map["bank_front_page"]]["logo"]) if os.path.exists(os.path.join("franken_logos", BANK_CONFIG[component_map["bank_front_page"]]["logo"])) else "",
+        "logo_path": logo_data_uri(BANK_CONFIG[component_map["bank_front_page"]]["logo"], "franken_logos"),
         "important_info": important_info, "summary": summary, "deposits": deposits, "withdrawals": withdrawals,
         "daily_balances": daily_balances, "transactions": transactions,
         "opening_balance": f"${initial_balance:,.2f}" if component_map["bank_balance"] != "citibank" else f"£{initial_balance:,.2f}",
@@ -359,10 +765,10 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, compo
                        "Business Checking",
         "show_fee_waiver": service_fee == 0, "statement_start": statement_start, "statement_end": statement_end,
         "day_delta": day_delta, "balance_map": balance_map,
-        "client_number": fake.uuid4()[:8] if component_map["bank_front_page"] == "citibank" else "",
-        "date_of_birth": fake.date_of_birth(minimum_age=18, maximum_age=80).strftime("%m/%d/%Y") if component_map["bank_front_page"] == "citibank" else "",
+        "client_number": (identity.get("client_number") or get_faker().uuid4()[:8]) if component_map["bank_front_page"] == "citibank" else "",
+        "date_of_birth": (identity.get("date_of_birth") or get_faker().date_of_birth(minimum_age=18, maximum_age=80).strftime("%m/%d/%Y")) if component_map["bank_front_page"] == "citibank" else "",
         "customer_account_number": account_number if component_map["bank_front_page"] == "citibank" else "",
-        "customer_iban": f"GB{fake.random_number(digits=2)}CITI{fake.random_number(digits=14)}" if component_map["bank_front_page"] == "citibank" else "",
+        "customer_iban": (identity.get("customer_iban") or f"GB{get_faker().random_number(digits=2)}CITI{get_faker().random_number(digits=14)}") if component_map["bank_front_page"] == "citibank" else "",
         "customer_bank_name": "Citibank" if component_map["bank_front_page"] == "citibank" else "",
         "bank_front_page_template": BANK_CONFIG[component_map["bank_front_page"]]["components"]["bank_front_page"],
         "account_summary_template": BANK_CONFIG[component_map["account_summary"]]["components"]["account_summary"],
@@ -370,41 +776,167 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, compo
         "disclosures_template": BANK_CONFIG[component_map["disclosures"]]["components"]["disclosures"],
         "component_map": component_map
     }
+    timer.mark("template_data")
+    rendered_html = template.render(**template_data)
+    timer.mark("jinja_render")
+    timer.done()
+    return rendered_html
 
+# Convert rendered HTML to PDF bytes through wkhtmltopdf's stdout, without touching disk
+def html_to_pdf_bytes(rendered_html: str, render_pool=None) -> bytes:
+    with frankenmetrics.span("statement.pdf"):
+        if render_pool is not None:
+            pdf = render_pool.render(rendered_html)
+        else:
+            pdf = pdfkit.from_string(rendered_html, False, configuration=get_pdfkit_configuration(), options=PDF_OPTIONS)
+    frankenmetrics.incr("statement.pdf_rendered")
+    return pdf
 
+# Unlink an output file before it is rewritten. Outputs may be hard links into the output cache
+# (see frankencache), and writing through the link would change the cached copy as well.
+def release_output_path(path: str) -> str:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return path
+
+# Single background writer for optional persistence of in-memory outputs
+@lru_cache(maxsize=None)
+def _persist_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="franken-persist")
+
+def _write_files(files: Dict[str, str | bytes]) -> List[str]:
+    with frankenmetrics.span("statement.persist"):
+        for path, content in files.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(release_output_path(path), 'wb') as f:
+                f.write(content.encode('utf-8') if isinstance(content, str) else content)
+    return list(files)
+
+# Background writes that failed, oldest first. Nobody waits on most persist futures, so a failed
+# write (disk full, permissions) is kept here until persist_failures() collects it.
+PERSIST_FAILURE_HISTORY = 100
+_persist_failures: deque = deque(maxlen=PERSIST_FAILURE_HISTORY)
+_persist_failures_lock = threading.Lock()
+
+def _record_persist_failure(paths: List[str], future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        frankenmetrics.incr("statement.persist_failures")
+        with _persist_failures_lock:
+            _persist_failures.append({"paths": paths, "error": f"{type(error).__name__}: {error}", "time": datetime.now().isoformat(timespec="seconds")})
+
+# Failed background writes recorded since the last call (at most PERSIST_FAILURE_HISTORY), each
+# {"paths", "error", "time"}; clear=False leaves them to be collected again
+def persist_failures(clear: bool = True) -> List[Dict]:
+    with _persist_failures_lock:
+        failures = list(_persist_failures)
+        if clear:
+            _persist_failures.clear()
+    return failures
+
+# Wait for every write queued so far, then collect the failures as persist_failures() does
+def flush_persist(timeout: float | None = None, clear: bool = True) -> List[Dict]:
+    # The writer is a single thread, so a no-op queued now runs after everything before it
+    _persist_executor().submit(lambda: None).result(timeout)
+    return persist_failures(clear)
+
+# Write {path: text or bytes} on the background writer; the future resolves to the written paths.
+# Failures are recorded for persist_failures() even if the caller drops the future.
+def persist_outputs_async(files: Dict[str, str | bytes]) -> Future:
+    future = _persist_executor().submit(_write_files, dict(files))
+    future.add_done_callback(partial(_record_persist_failure, list(files)))
+    return future
+
+# Generate populated HTML and PDF. With in_memory=True wkhtmltopdf writes to stdout and the result is
+# [(html, pdf_bytes)]; the files are then written to output_dir in the background (skipped if output_dir is None).
+def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, component_map: Dict[str, str], template_dir: str = "f_templates", output_dir: str | None = "output_statements", account_type: str = Field(..., description="Type of account (personal or business)"), output_name: str | None = None, render_pool=None, initial_balance: float | None = None, statement_start: datetime | None = None, statement_end: datetime | None = None, account_number: str | None = None, account_holder_address: str | None = None, statement_date: datetime | None = None, in_memory: bool = False, identity: Dict[str, str] | None = None) -> list:
+    rendered_html = render_statement_html(
+        df, account_holder, component_map, template_dir, account_type,
+        initial_balance=initial_balance,
+        statement_start=statement_start,
+        statement_end=statement_end,
+        account_number=account_number,
+        account_holder_address=account_holder_address,
+        statement_date=statement_date,
+        identity=identity
+    )
+    if output_name is None:
+        output_name = statement_output_name(account_holder, component_map, account_type)
+    html_filename = os.path.join(output_dir or "", f"{output_name}.html")
+    pdf_filename = os.path.join(output_dir or "", f"{output_name}.pdf")
     
-    template_name_base = "_".join([f"{k}_{v}" for k, v in component_map.items()])
-    html_filename = os.path.join(output_dir, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}_{template_name_base}.html")
-    pdf_filename = os.path.join(output_dir, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}_{template_name_base}.pdf")
-    
-    rendered_html = template.render(**template_data)
+    if in_memory:
+        try:
+            pdf_bytes = html_to_pdf_bytes(rendered_html, render_pool)
+        except (OSError, RuntimeError) as e:
+            frankenmetrics.incr("statement.pdf_failures")
+            raise Exception(f"PDF generation failed for {component_map} template: {e}")
+        if output_dir is not None:
+            persist_outputs_async({html_filename: rendered_html, pdf_filename: pdf_bytes})
+        return [(rendered_html, pdf_bytes)]
     
-    with open(html_filename, 'w', encoding='utf-8') as f:
-        f.write(rendered_html)
+    with frankenmetrics.span("statement.write_html"):
+        with open(release_output_path(html_filename), 'w', encoding='utf-8') as f:
+            f.write(rendered_html)
+    release_output_path(pdf_filename)
     
-    wkhtmltopdf_path = os.environ.get("WKHTMLTOPDF_PATH", "/usr/bin/wkhtmltopdf")
-    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
-    options = {
-        "enable-local-file-access": "",
-        "page-size": "Letter",
-        "margin-top": "0.8in",
-        "margin-right": "0.9in",
-        "margin-bottom": "0.8in",
-        "margin-left": "0.9in",
-        "encoding": "UTF-8",
-        "disable-javascript": "",
-        "image-dpi": "300",
-        "enable-forms": "",
-        "no-outline": "",
-        "print-media-type": "",
-        "minimum-font-size": "10"
-    }
     try:
-        pdfkit.from_string(rendered_html, pdf_filename, configuration=config, options=options)
+        with frankenmetrics.span("statement.pdf"):
+            if render_pool is not None:
+                render_pool.render(rendered_html, pdf_filename)
+            else:
+                pdfkit.from_string(rendered_html, pdf_filename, configuration=get_pdfkit_configuration(), options=PDF_OPTIONS)
+        frankenmetrics.incr("statement.pdf_rendered")
         return [(html_filename, pdf_filename)]
-    except OSError as e:
+    except (OSError, RuntimeError) as e:
+        frankenmetrics.incr("statement.pdf_failures")
         raise Exception(f"PDF generation failed for {component_map} template: {e}")
 
+# First day of the month that is `months` months after month_start
+def _add_months(month_start: datetime, months: int) -> datetime:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+# Lazily generate consecutive monthly statements for one synthetic customer. Each month opens with
+# the previous month's closing balance and only the current month's ledger is held in memory.
+def generate_statement_series(months: int, account_holder: str, component_map: Dict[str, str], account_type: str, num_transactions: int | tuple[int, int] = (10, 25), start_month: datetime | None = None, initial_balance: float | None = None, template_dir: str = "f_templates", output_dir: str = "output_statements", render: bool = True, render_pool=None, identity: Dict[str, str] | None = None) -> Iterator[Dict]:
+    if months < 1:
+        raise ValueError("Number of months must be at least 1")
+    rng = get_rng()
+    if start_month is None:
+        start_month = _add_months(datetime.now(), -months)
+    start_month = start_month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    balance = round(float(rng.uniform(1000, 20000)), 2) if initial_balance is None else initial_balance
+    # The same account details appear on every statement in the series
+    identity = identity or {}
+    account_number = identity.get("account_number") or get_faker().bban()[:15]
+    address = identity.get("account_holder_address") or get_faker().address().replace('\n', '<br>')[:100]
+    if render:
+        os.makedirs(output_dir, exist_ok=True)
+
+    for i in range(months):
+        month_start = _add_months(start_month, i)
+        month_end = _add_months(start_month, i + 1) - timedelta(days=1)
+        count = num_transactions if isinstance(num_transactions, int) else int(rng.integers(num_transactions[0], num_transactions[1] + 1))
+        df = generate_bank_statement(count, account_holder, account_type, rng=rng, start_date=month_start, num_days=(month_end - month_start).days + 1, initial_balance=balance)
+        totals = compute_statement_totals(df, balance)
+        statement = {
+            "month": month_start.strftime("%Y-%m"), "statement_start": month_start, "statement_end": month_end,
+            "opening_balance": balance, "closing_balance": totals["ending_balance"], "service_fee": totals["service_fee"],
+            "ledger": df, "html_path": None, "pdf_path": None
+        }
+        if render:
+            statement["html_path"], statement["pdf_path"] = generate_populated_html_and_pdf(
+                df, account_holder, component_map, template_dir, output_dir, account_type,
+                output_name=f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}_{month_start:%Y_%m}",
+                render_pool=render_pool, initial_balance=balance, statement_start=month_start, statement_end=month_end,
+                account_number=account_number, account_holder_address=address, statement_date=month_end, identity=identity
+            )[0]
+        yield statement
+        balance = totals["ending_balance"]
+
 # Generate important info
 def generate_important_info(bank: str, account_type: str) -> str:
     if account_type == "business":
@@ -428,6 +960,10 @@ def generate_important_info(bank: str, account_type: str) -> str:
     return "<p>No specific important information available.</p>"
 
 if __name__ == "__main__":
+    # With arguments, act as the dataset builder CLI (see frankendataset.py)
+    if len(sys.argv) > 1:
+        from frankendataset import main
+        sys.exit(main(sys.argv[1:]))
     df = generate_bank_statement(10, "John Doe", "personal")
     component_map = {"bank_front_page": "chase", "account_summary": "pnc", "bank_balance": "wellsfargo", "disclosures": "citibank"}
     output_files = generate_populated_html_and_pdf(df, "John Doe", component_map, "f_templates", "output_statements", "personal")
@@ -0,0 +1,111 @@
+import os
+import tempfile
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Union
+import numpy as np
+from frankengen import get_rng
+
+DEFAULT_POOL_SIZE = 10000
+DEFAULT_POOL_PATH = os.path.join(".franken_cache", "identity_pool.npz")
+POOL_FIELDS = ("names", "companies", "addresses", "bbans", "ibans", "client_numbers", "birth_dates")
+
+# Pre-generated Faker identities held as fixed-width NumPy string arrays. Draws are plain index
+# sampling, so bulk generation never calls Faker after the pool is built or loaded.
+class IdentityPool:
+    def __init__(self, names: np.ndarray, companies: np.ndarray, addresses: np.ndarray, bbans: np.ndarray, ibans: np.ndarray, client_numbers: np.ndarray, birth_dates: np.ndarray, seed: Optional[int] = None):
+        self.seed = seed
+        self.names = names
+        self.companies = companies
+        self.addresses = addresses
+        self.bbans = bbans
+        self.ibans = ibans
+        self.client_numbers = client_numbers
+        self.birth_dates = birth_dates
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # Generate size identities with a Faker instance seeded independently of the global one
+    @classmethod
+    def build(cls, size: int = DEFAULT_POOL_SIZE, seed: int = 0, locale: Optional[str] = None) -> "IdentityPool":
+        if size < 1:
+            raise ValueError("Identity pool size must be at least 1")
+        from faker import Faker
+        faker = Faker(locale)
+        faker.seed_instance(seed)
+        rows = range(size)
+        return cls(
+            names=np.array([faker.name() for _ in rows]),
+            companies=np.array([faker.company() for _ in rows]),
+            addresses=np.array([faker.address().replace('\n', '<br>')[:100] for _ in rows]),
+            bbans=np.array([faker.bban()[:15] for _ in rows]),
+            ibans=np.array([f"GB{faker.random_number(digits=2)}CITI{faker.random_number(digits=14)}" for _ in rows]),
+            client_numbers=np.array([faker.uuid4()[:8] for _ in rows]),
+            birth_dates=np.array([faker.date_of_birth(minimum_age=18, maximum_age=80).strftime("%m/%d/%Y") for _ in rows]),
+            seed=seed
+        )
+
+    # Compressed .npz with plain string arrays (no pickles); written atomically
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".identity_", suffix=".npz", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, seed=np.array(-1 if self.seed is None else self.seed), **{field: getattr(self, field) for field in POOL_FIELDS})
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "IdentityPool":
+        with np.load(path, allow_pickle=False) as data:
+            missing = [field for field in POOL_FIELDS if field not in data.files]
+            if missing:
+                raise ValueError(f"Identity pool {path} is missing fields: {missing}")
+            seed = int(data["seed"]) if "seed" in data.files else -1
+            return cls(**{field: data[field] for field in POOL_FIELDS}, seed=None if seed < 0 else seed)
+
+    # Draw n identities at once. account_types is one type for all rows or one per row.
+    # Returns equal-length arrays keyed like the template fields they fill.
+    def draw(self, n: int, account_types: Union[str, Sequence[str], np.ndarray] = "personal", rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        rng = rng or get_rng()
+        is_business = np.broadcast_to(np.asarray(account_types) == "business", (n,))
+        idx = rng.integers(0, len(self), (6, n))
+        holders = np.where(is_business, self.companies[idx[0]], self.names[idx[0]])
+        return {
+            "account_holder": np.char.upper(holders),
+            "account_holder_address": self.addresses[idx[1]],
+            "account_number": self.bbans[idx[2]],
+            "customer_iban": self.ibans[idx[3]],
+            "client_number": self.client_numbers[idx[4]],
+            "date_of_birth": self.birth_dates[idx[5]]
+        }
+
+    # One identity as plain strings
+    def draw_one(self, account_type: str = "personal", rng: Optional[np.random.Generator] = None) -> Dict[str, str]:
+        return {field: str(values[0]) for field, values in self.draw(1, account_type, rng).items()}
+
+    def memory_usage(self) -> int:
+        return sum(getattr(self, field).nbytes for field in POOL_FIELDS)
+
+# Load the pool at path, building and saving it first if it does not exist yet. One pool per process.
+@lru_cache(maxsize=None)
+def get_identity_pool(path: Optional[str] = DEFAULT_POOL_PATH, size: int = DEFAULT_POOL_SIZE, seed: int = 0) -> IdentityPool:
+    if path and os.path.exists(path):
+        pool = IdentityPool.load(path)
+        if len(pool) == size and pool.seed == seed:
+            return pool
+    pool = IdentityPool.build(size, seed)
+    if path:
+        pool.save(path)
+    return pool
+
+# Identity for one statement of a bulk run, drawn from the process pool with the shared generator so
+# it follows the statement's seed. An explicit account_holder replaces the drawn one.
+def draw_identity(account_type: str, account_holder: Optional[str] = None, rng: Optional[np.random.Generator] = None) -> Dict[str, str]:
+    identity = get_identity_pool().draw_one(account_type, rng)
+    if account_holder:
+        identity["account_holder"] = account_holder
+    return identity
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = os.environ.get("FRANKEN_METRICS", "").lower() in ("1", "true", "yes")
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    # Upper bound of the bucket holding the q-th quantile
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {("+Inf" if i == len(BUCKETS) else str(BUCKETS[i])): c for i, c in enumerate(self.counts) if c}
+        }
+
+# Process-wide store of timing histograms and counters
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": _enabled,
+                "timings": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items()))
+            }
+
+REGISTRY = MetricsRegistry()
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def incr(name: str, amount: int = 1) -> None:
+    if _enabled:
+        REGISTRY.incr(name, amount)
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        REGISTRY.observe(self.name, time.perf_counter() - self.start)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def mark(self, stage: str) -> None:
+        pass
+
+    def done(self) -> None:
+        pass
+
+_NOOP = _NoopSpan()
+
+# Time a block: `with span("statement.render"): ...`
+def span(name: str):
+    return _Span(name) if _enabled else _NOOP
+
+# Times consecutive stages of one long function without re-indenting it: each mark(stage)
+# records the time since the previous mark as <prefix>.<stage>, and done() records <prefix>.total.
+class StageTimer:
+    __slots__ = ("prefix", "start", "last")
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        REGISTRY.observe(f"{self.prefix}.{stage}", now - self.last)
+        self.last = now
+
+    def done(self) -> None:
+        REGISTRY.observe(f"{self.prefix}.total", time.perf_counter() - self.start)
+
+def stage_timer(prefix: str):
+    return StageTimer(prefix) if _enabled else _NOOP
+
+def snapshot() -> Dict:
+    return REGISTRY.snapshot()
+
+def reset() -> None:
+    REGISTRY.reset()
+
+def to_json(indent: Optional[int] = 2) -> str:
+    return json.dumps(snapshot(), indent=indent)
+
+# Prometheus-style text exposition of the current snapshot
+def to_text(namespace: str = "franken") -> str:
+    data = snapshot()
+    lines: List[str] = []
+    for name, value in data["counters"].items():
+        metric = f"{namespace}_{_metric_name(name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, histogram in data["timings"].items():
+        metric = f"{namespace}_{_metric_name(name)}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound in [str(b) for b in BUCKETS] + ["+Inf"]:
+            cumulative += histogram["buckets"].get(bound, 0)
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f"{metric}_sum {histogram['sum']:.6f}", f"{metric}_count {histogram['count']}"]
+    return "\n".join(lines) + "\n"
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+# Write the snapshot as JSON or Prometheus text, chosen by file extension
+def export(path: str) -> str:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(to_json() if path.endswith(".json") else to_text())
+    return path
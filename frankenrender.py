@@ -0,0 +1,165 @@
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Union
+from frankengen import PDF_OPTIONS, get_wkhtmltopdf_path
+
+# Build the wkhtmltopdf command line once, using the same option rules as pdfkit
+def build_wkhtmltopdf_args(wkhtmltopdf_path: str, options: Dict[str, str]) -> List[str]:
+    args = [wkhtmltopdf_path, "--quiet"]
+    for key, value in options.items():
+        args.append(key if key.startswith("-") else f"--{key}")
+        if value:
+            args.append(str(value))
+    return args
+
+# Command line for a multi-document bundle. Bundles keep their PDF outline: wkhtmltopdf adds one
+# top-level bookmark per input document, titled with that document's <title>, and the bundle is split
+# back into statements by those bookmarks.
+def bundle_wkhtmltopdf_args(base_args: List[str]) -> List[str]:
+    return [arg for arg in base_args if arg != "--no-outline"] + ["--outline", "--outline-depth", "1"]
+
+# Convert one or more HTML documents with a single wkhtmltopdf invocation.
+# Returns the PDF bytes when pdf_path is None, otherwise the path written.
+def run_wkhtmltopdf(base_args: List[str], html_docs: Sequence[str], pdf_path: Optional[str] = None, timeout: Optional[float] = None) -> Union[bytes, str]:
+    if not html_docs:
+        raise ValueError("At least one HTML document is required")
+    input_files = []
+    try:
+        if len(html_docs) == 1:
+            inputs = ["-"]
+            stdin = html_docs[0].encode("utf-8")
+        else:
+            # Written to the working directory so relative asset paths resolve as they do for stdin
+            for html in html_docs:
+                fd, path = tempfile.mkstemp(prefix=".franken_render_", suffix=".html", dir=os.getcwd())
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                input_files.append(path)
+            inputs = input_files
+            stdin = None
+        output = pdf_path or "-"
+        completed = subprocess.run(base_args + inputs + [output], input=stdin, capture_output=True, timeout=timeout)
+    finally:
+        for path in input_files:
+            os.remove(path)
+    if completed.returncode != 0:
+        raise RuntimeError(f"wkhtmltopdf exited with non-zero code {completed.returncode}. error:\n{completed.stderr.decode('utf-8', 'replace')}")
+    return pdf_path if pdf_path else completed.stdout
+
+class _RenderJob:
+    __slots__ = ("html_docs", "pdf_path", "outline", "future")
+
+    def __init__(self, html_docs: List[str], pdf_path: Optional[str], outline: bool = False):
+        self.html_docs = html_docs
+        self.pdf_path = pdf_path
+        self.outline = outline
+        self.future: Future = Future()
+
+class _RenderSlot:
+    def __init__(self, index: int):
+        self.index = index
+        self.thread: Optional[threading.Thread] = None
+        self.busy = False
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.last_error: Optional[str] = None
+
+# Caps how many wkhtmltopdf processes run at once and how many jobs may wait for one. wkhtmltopdf has
+# no resident mode, so every job still starts its own process and pays its startup; only bundles
+# (render_bundle) amortise that across documents. Each job runs under the per-job timeout.
+class BoundedRenderPool:
+    def __init__(self, workers: int = 2, max_queue: int = 64, job_timeout: float = 120.0, wkhtmltopdf_path: Optional[str] = None, options: Optional[Dict[str, str]] = None):
+        if workers < 1:
+            raise ValueError("Number of workers must be at least 1")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.base_args = build_wkhtmltopdf_args(wkhtmltopdf_path or get_wkhtmltopdf_path(), PDF_OPTIONS if options is None else options)
+        self._jobs: "queue.Queue[Optional[_RenderJob]]" = queue.Queue(maxsize=max_queue)
+        self._slots = [_RenderSlot(i) for i in range(workers)]
+        self._closed = False
+        for slot in self._slots:
+            slot.thread = threading.Thread(target=self._work, args=(slot,), name=f"render-slot-{slot.index}", daemon=True)
+            slot.thread.start()
+
+    def __enter__(self) -> "BoundedRenderPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _work(self, slot: _RenderSlot) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            slot.busy = True
+            try:
+                args = bundle_wkhtmltopdf_args(self.base_args) if job.outline else self.base_args
+                result = run_wkhtmltopdf(args, job.html_docs, job.pdf_path, self.job_timeout)
+            except subprocess.TimeoutExpired:
+                slot.jobs_failed += 1
+                slot.last_error = "job timed out"
+                job.future.set_exception(TimeoutError(f"Render job did not finish within {self.job_timeout}s"))
+            except Exception as e:
+                slot.jobs_failed += 1
+                slot.last_error = f"{type(e).__name__}: {e}"
+                job.future.set_exception(e)
+            else:
+                slot.jobs_done += 1
+                job.future.set_result(result)
+            finally:
+                slot.busy = False
+
+    # Queue a render; raises queue.Full when the queue is saturated and block is False or timeout expires
+    # With outline=True the documents are rendered as a bundle (see bundle_wkhtmltopdf_args)
+    def submit(self, html: Union[str, Sequence[str]], pdf_path: Optional[str] = None, block: bool = True, timeout: Optional[float] = None, outline: bool = False) -> Future:
+        if self._closed:
+            raise RuntimeError("Render pool is closed")
+        html_docs = [html] if isinstance(html, str) else list(html)
+        job = _RenderJob(html_docs, pdf_path, outline)
+        self._jobs.put(job, block=block, timeout=timeout)
+        return job.future
+
+    # Render one document and wait for the PDF bytes (or path when pdf_path is given)
+    def render(self, html: str, pdf_path: Optional[str] = None) -> Union[bytes, str]:
+        return self.submit(html, pdf_path).result()
+
+    # Render several documents into one PDF with a single wkhtmltopdf invocation
+    def render_bundle(self, html_docs: Sequence[str], pdf_path: Optional[str] = None) -> Union[bytes, str]:
+        return self.submit(list(html_docs), pdf_path, outline=True).result()
+
+    # Per-slot state; a slot whose thread has died is reported but never serves jobs again
+    def health_check(self) -> List[Dict]:
+        return [{
+            "worker": slot.index, "status": "busy" if slot.busy else "idle", "alive": slot.thread.is_alive(),
+            "jobs_done": slot.jobs_done, "jobs_failed": slot.jobs_failed, "last_error": slot.last_error
+        } for slot in self._slots]
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": self._jobs.qsize(),
+            "max_queue": self.max_queue,
+            "busy": sum(1 for slot in self._slots if slot.busy),
+            "jobs_done": sum(slot.jobs_done for slot in self._slots),
+            "jobs_failed": sum(slot.jobs_failed for slot in self._slots)
+        }
+
+    # Finish queued jobs, then stop the slot threads
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._slots:
+            self._jobs.put(None)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for slot in self._slots:
+            slot.thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
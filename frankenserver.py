@@ -0,0 +1,318 @@
+import os
+import re
+import json
+import time
+import uuid
+import random
+import queue
+import argparse
+import threading
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError
+from frankengen import (
+    seed_generators,
+    generate_bank_statement,
+    render_statement_html,
+    BANK_CONFIG,
+    SUPPORTED_COMPONENTS
+)
+from frankenbatch import BatchSpec, BatchResult, validate_component_map
+from frankenidentity import draw_identity, get_identity_pool
+from frankenrender import BoundedRenderPool
+from frankentemplates import start_template_watcher
+
+# Finished jobs kept for status queries and downloads before the oldest are forgotten
+MAX_FINISHED_JOBS = 1000
+# Number of recent statement latencies used for the percentile counters
+LATENCY_WINDOW = 1000
+MAX_BODY_BYTES = 1 << 20
+
+class JobRequest(BaseModel):
+    specs: List[BatchSpec] = Field(..., description="Statements to generate in this job")
+
+class Job:
+    def __init__(self, specs: List[BatchSpec]):
+        self.id = uuid.uuid4().hex
+        self.specs = specs
+        self.status = "queued"
+        self.results: List[BatchResult] = []
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.specs),
+            "completed": len(self.results),
+            "failed": sum(1 for r in self.results if r.status != "ok"),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "results": [
+                {**r.model_dump(exclude={"html_path", "pdf_path"}),
+                 "artifacts": {kind: f"/jobs/{self.id}/artifacts/{r.index}.{kind}" for kind in ("html", "pdf")} if r.status == "ok" else {}}
+                for r in list(self.results)
+            ]
+        }
+
+# Bounded job queue drained by one worker thread per render slot. Ledger synthesis shares the
+# process-wide random state, so it runs under a lock; PDF conversion runs in parallel on the pool.
+class JobManager:
+    def __init__(self, render_pool: BoundedRenderPool, max_queue: int = 32, template_dir: str = "f_templates", output_dir: str = "output_statements"):
+        self.render_pool = render_pool
+        self.template_dir = template_dir
+        self.output_dir = output_dir
+        self.max_queue = max_queue
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._synthesis_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+        self.counters = {"jobs_submitted": 0, "jobs_rejected": 0, "jobs_finished": 0, "statements_ok": 0, "statements_failed": 0}
+        os.makedirs(output_dir, exist_ok=True)
+        # Load (or build) the identity pool up front rather than inside the first job
+        get_identity_pool()
+        self._threads = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(render_pool.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    # Queue a job; raises queue.Full when the service is saturated
+    def submit(self, specs: List[BatchSpec]) -> Job:
+        if not specs:
+            raise ValueError("A job needs at least one statement spec")
+        for spec in specs:
+            validate_component_map(spec.component_map)
+        job = Job(specs)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._metrics_lock:
+                self.counters["jobs_rejected"] += 1
+            raise
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+        with self._metrics_lock:
+            self.counters["jobs_submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _forget_old_jobs(self) -> None:
+        with self._jobs_lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            job.status = "running"
+            job.started_at = time.time()
+            for index, spec in enumerate(job.specs):
+                job.results.append(self._generate(job, index, spec))
+            job.status = "failed" if all(r.status != "ok" for r in job.results) else "done"
+            job.finished_at = time.time()
+            job.done.set()
+            with self._metrics_lock:
+                self.counters["jobs_finished"] += 1
+            self._forget_old_jobs()
+
+    def _generate(self, job: Job, index: int, spec: BatchSpec) -> BatchResult:
+        start = time.perf_counter()
+        result = BatchResult(index=index, status="ok", seed=spec.seed, component_map=spec.component_map,
+                             account_type=spec.account_type, num_transactions=spec.num_transactions)
+        output_name = f"{job.id}_{index:04d}"
+        try:
+            with self._synthesis_lock:
+                seed_generators(spec.seed)
+                identity = draw_identity(spec.account_type, spec.account_holder)
+                account_holder = identity["account_holder"]
+                df = generate_bank_statement(spec.num_transactions, account_holder, spec.account_type)
+                html = render_statement_html(df, account_holder, spec.component_map, self.template_dir, spec.account_type, identity=identity)
+            result.account_holder = account_holder
+            result.html_path = os.path.join(self.output_dir, f"{output_name}.html")
+            result.pdf_path = os.path.join(self.output_dir, f"{output_name}.pdf")
+            with open(result.html_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            self.render_pool.render(html, result.pdf_path)
+        except Exception as e:
+            result.status = "failed"
+            result.error = f"{type(e).__name__}: {e}"
+        result.seconds = round(time.perf_counter() - start, 4)
+        with self._metrics_lock:
+            self.counters["statements_ok" if result.status == "ok" else "statements_failed"] += 1
+            self._latencies.append(result.seconds)
+        return result
+
+    def metrics(self) -> Dict:
+        with self._metrics_lock:
+            counters = dict(self.counters)
+            latencies = sorted(self._latencies)
+        uptime = time.time() - self.started
+        percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+        return {
+            **counters,
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "uptime_seconds": round(uptime, 3),
+            "statements_per_second": round((counters["statements_ok"] + counters["statements_failed"]) / uptime, 4) if uptime else 0.0,
+            "latency_seconds": {"p50": percentile(0.5), "p95": percentile(0.95), "max": latencies[-1] if latencies else 0.0, "window": len(latencies)},
+            "render_pool": self.render_pool.stats()
+        }
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+_ARTIFACT_PATH = re.compile(r"^/jobs/([0-9a-f]{32})/artifacts/(\d+)\.(html|pdf)$")
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})$")
+_CONTENT_TYPES = {"html": "text/html; charset=utf-8", "pdf": "application/pdf"}
+
+# Routes:
+#   POST /statements                     one statement spec, queued as a single-statement job
+#   POST /jobs                           {"specs": [...]} batch job
+#   GET  /jobs/<id>                      job status and per-statement results
+#   GET  /jobs/<id>/artifacts/<n>.<ext>  download the html or pdf of statement n
+#   GET  /metrics, GET /health, GET /banks
+class StatementRequestHandler(BaseHTTPRequestHandler):
+    manager: JobManager = None
+    server_version = "FrankenBank/1.0"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"Request body larger than {MAX_BODY_BYTES} bytes")
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _submit(self, specs_payload) -> None:
+        try:
+            specs = JobRequest(specs=specs_payload).specs
+            job = self.manager.submit(specs)
+        except (ValidationError, ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except queue.Full:
+            self._send_json(429, {"error": "Job queue is full, retry later"}, {"Retry-After": "1"})
+            return
+        self._send_json(202, {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}, {"Location": f"/jobs/{job.id}"})
+
+    def do_POST(self) -> None:
+        try:
+            payload = self._read_json()
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+        if self.path == "/statements":
+            if isinstance(payload, dict):
+                payload.setdefault("seed", random.getrandbits(63))
+            self._submit([payload])
+        elif self.path == "/jobs":
+            self._submit(payload.get("specs") if isinstance(payload, dict) else None)
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "render_workers": self.manager.render_pool.health_check()})
+            return
+        if self.path == "/metrics":
+            self._send_json(200, self.manager.metrics())
+            return
+        if self.path == "/banks":
+            self._send_json(200, {"banks": list(BANK_CONFIG.keys()), "components": SUPPORTED_COMPONENTS})
+            return
+        match = _JOB_PATH.match(self.path)
+        if match:
+            job = self.manager.get(match.group(1))
+            if job is None:
+                self._send_json(404, {"error": "Unknown job"})
+            else:
+                self._send_json(200, job.to_dict())
+            return
+        match = _ARTIFACT_PATH.match(self.path)
+        if match:
+            self._send_artifact(match.group(1), int(match.group(2)), match.group(3))
+            return
+        self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def _send_artifact(self, job_id: str, index: int, kind: str) -> None:
+        job = self.manager.get(job_id)
+        if job is None or index >= len(job.results):
+            self._send_json(404, {"error": "Unknown job or statement not finished"})
+            return
+        result = job.results[index]
+        path = result.html_path if kind == "html" else result.pdf_path
+        if result.status != "ok" or not path or not os.path.exists(path):
+            self._send_json(404, {"error": result.error or "Artifact not available"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", _CONTENT_TYPES[kind])
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        self.end_headers()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 16):
+                self.wfile.write(chunk)
+
+# Build a server bound to host:port (port 0 picks a free port). Returns (server, manager).
+def make_server(host: str = "127.0.0.1", port: int = 8765, render_pool: Optional[BoundedRenderPool] = None, workers: int = 2, max_queue: int = 32, template_dir: str = "f_templates", output_dir: str = "output_statements") -> Tuple[ThreadingHTTPServer, JobManager]:
+    render_pool = render_pool or BoundedRenderPool(workers=workers, max_queue=max(max_queue, workers))
+    manager = JobManager(render_pool, max_queue=max_queue, template_dir=template_dir, output_dir=output_dir)
+    handler = type("BoundStatementRequestHandler", (StatementRequestHandler,), {"manager": manager})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, manager
+
+# watch_templates keeps compiled templates warm and picks up edits through filesystem events (needs watchdog)
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = 2, max_queue: int = 32, template_dir: str = "f_templates", output_dir: str = "output_statements", watch_templates: bool = False) -> None:
+    registry = start_template_watcher([template_dir]) if watch_templates else None
+    with BoundedRenderPool(workers=workers, max_queue=max(max_queue, workers)) as render_pool:
+        server, manager = make_server(host, port, render_pool, workers, max_queue, template_dir, output_dir)
+        print(f"Serving statement generation on http://{server.server_address[0]}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            manager.close()
+            if registry is not None:
+                registry.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP service for synthetic bank statement generation")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent wkhtmltopdf renders (and job worker threads)")
+    parser.add_argument("--max-queue", type=int, default=32, help="Queued jobs accepted before answering 429")
+    parser.add_argument("--template-dir", default="f_templates")
+    parser.add_argument("--output-dir", default="output_statements")
+    parser.add_argument("--watch-templates", action="store_true", help="Reload edited templates from filesystem events instead of mtime checks (needs watchdog)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_queue, args.template_dir, args.output_dir, args.watch_templates)
@@ -0,0 +1,131 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+from jinja2 import TemplateSyntaxError
+import frankenmetrics
+from frankengen import get_template_env, watch_template_dir, template_changed
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog is optional; without it environments fall back to per-lookup mtime checks
+    Observer = None
+    FileSystemEventHandler = object
+
+DEFAULT_TEMPLATE_DIRS = ("f_templates", os.path.join("super", "templates"))
+TEMPLATE_SUFFIXES = (".html",)
+
+def watchdog_available() -> bool:
+    return Observer is not None
+
+def _require_watchdog() -> None:
+    if Observer is None:
+        raise RuntimeError("watchdog is required to watch template directories (pip install watchdog)")
+
+# Forwards file events in one template directory to the registry
+class _TemplateEventHandler(FileSystemEventHandler):
+    def __init__(self, registry: "TemplateRegistry", template_dir: str):
+        self.registry = registry
+        self.template_dir = template_dir
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+            return
+        # Editors often save by writing a temp file and renaming it over the template
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path:
+                self.registry.changed(self.template_dir, os.fsdecode(path))
+
+# Keeps compiled templates and their field introspection warm for a long-running process. The
+# template directories are watched instead of stat()ed on every lookup. An edited template is
+# dropped and recompiled on its own; every other template stays compiled.
+class TemplateRegistry:
+    def __init__(self, template_dirs: Iterable[str] = DEFAULT_TEMPLATE_DIRS, precompile: bool = True):
+        self.template_dirs = [os.path.abspath(d) for d in template_dirs]
+        self.precompile = precompile
+        self.reloads = 0
+        # Templates whose latest edit failed to compile, with the error
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def __enter__(self) -> "TemplateRegistry":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None
+
+    def start(self) -> "TemplateRegistry":
+        _require_watchdog()
+        if self._observer is not None:
+            return self
+        observer = Observer()
+        for template_dir in self.template_dirs:
+            if os.path.isdir(template_dir):
+                observer.schedule(_TemplateEventHandler(self, template_dir), template_dir, recursive=True)
+        observer.start()
+        # Mark directories watched only once events are flowing, so no edit falls between the two
+        for template_dir in self.template_dirs:
+            if os.path.isdir(template_dir):
+                watch_template_dir(template_dir)
+        self._observer = observer
+        if self.precompile:
+            self.warm()
+        return self
+
+    def stop(self) -> None:
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join()
+        self._observer = None
+        for template_dir in self.template_dirs:
+            watch_template_dir(template_dir, watched=False)
+
+    def template_names(self, template_dir: str) -> List[str]:
+        return get_template_env(template_dir).list_templates(filter_func=lambda name: name.endswith(TEMPLATE_SUFFIXES))
+
+    # Compile every template up front; returns how many compiled
+    def warm(self) -> int:
+        count = 0
+        for template_dir in self.template_dirs:
+            if not os.path.isdir(template_dir):
+                continue
+            for name in self.template_names(template_dir):
+                count += self._compile(template_dir, name)
+        return count
+
+    def _compile(self, template_dir: str, name: str) -> bool:
+        key = os.path.join(template_dir, name)
+        try:
+            get_template_env(template_dir).get_template(name)
+        except TemplateSyntaxError as e:
+            # Left uncompiled, so renders raise the error until the template is fixed
+            self.errors[key] = f"{e.message} (line {e.lineno})"
+            return False
+        self.errors.pop(key, None)
+        return True
+
+    # Handle a change to path inside template_dir; ignores non-template and hidden/backup files
+    def changed(self, template_dir: str, path: str) -> Optional[str]:
+        name = os.path.relpath(path, template_dir).replace(os.sep, "/")
+        base = os.path.basename(name)
+        if name.startswith("..") or base.startswith(".") or not base.endswith(TEMPLATE_SUFFIXES):
+            return None
+        with self._lock:
+            template_changed(template_dir, name)
+            self.reloads += 1
+            frankenmetrics.incr("templates.reloads")
+            if self.precompile and os.path.exists(path):
+                self._compile(template_dir, name)
+            elif not os.path.exists(path):
+                self.errors.pop(os.path.join(template_dir, name), None)
+        return name
+
+# Start watching the given template directories
+def start_template_watcher(template_dirs: Iterable[str] = DEFAULT_TEMPLATE_DIRS, precompile: bool = True) -> TemplateRegistry:
+    return TemplateRegistry(template_dirs, precompile).start()
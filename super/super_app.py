@@ -141,6 +141,7 @@ if st.session_state["trigger_generate"]:
                 # Generate account holder based on account type
                 account_holder = fake.company().upper() if account_type == "business" else fake.name().upper()
                 df = generate_bank_statement(num_transactions, account_holder, account_type)
+                os.makedirs(SYNTHETIC_STAT_DIR, exist_ok=True)
                 csv_filename = os.path.join(SYNTHETIC_STAT_DIR, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}_{selected_bank_key}.csv")
                 df.to_csv(csv_filename, index=False, encoding='utf-8')
                 
@@ -0,0 +1,365 @@
+import os
+import re
+import sys
+import json
+import time
+import base64
+import hashlib
+import argparse
+import tempfile
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from pydantic import BaseModel, Field
+from jinja2 import Environment, TemplateSyntaxError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import frankenmetrics
+
+DEFAULT_MODEL = "gemma3:4b"
+DEFAULT_CACHE_DIR = os.path.join(".franken_cache", "extractions")
+DEFAULT_MAX_IN_FLIGHT = 4
+INPUT_IMAGES_DIR = "input_images"
+TEMPLATES_DIR = "templates"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+KNOWN_BANKS = ("chase", "citibank", "wellsfargo", "pnc")
+FALLBACK_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fallback_template.html")
+
+STRUCTURE_PROMPT = """
+You are an expert in extracting structured data from bank statement images to create reusable HTML templates. Analyze the provided bank statement image and output a JSON object with:
+- "bank_name": The bank name (e.g., PNC, Chase, Citibank, Wells Fargo) identified from text or logo, or "unknown" if unclear.
+- "fields": List of fields with variable names (e.g., {{account_holder}}, {{account_number}}, {{statement_period}}, {{account_type}}, {{account_holder_address}}, {{deposits}}, {{withdrawals}}, {{summary}}, {{important_info}}, {{logo_path}}, {{statement_start}}, {{statement_end}}, {{balance_map}}, {{show_fee_waiver}}) and their descriptions.
+- "layout": Description of the visual structure (e.g., header with bank name/logo and customer service info, account details section, summary table, deposits and withdrawals tables, daily balance table, footnotes).
+Return only valid JSON, no conversational text, wrapped in ```json\n...\n```. For fields, include variable names for a professional HTML template. For deposits and withdrawals, identify table columns (date, description, amount). Ensure compatibility with any bank statement layout.
+"""
+
+# Shorter prompt tried once the full one keeps failing to produce valid JSON
+SIMPLIFIED_STRUCTURE_PROMPT = """
+Analyze the bank statement image and output a JSON object with:
+- "bank_name": Identify the bank or "unknown".
+- "fields": List key fields with variable names (e.g., {{account_holder}}, {{deposits}}, {{withdrawals}}).
+- "layout": Brief description of the structure.
+Return only valid JSON, no conversational text, wrapped in ```json\n...\n```.
+"""
+
+TEMPLATE_PROMPT = """
+You are an expert in HTML/CSS design for bank statements. Using the provided template structure, generate a complete HTML template with placeholders for variables and professional CSS styling to match the described layout. The template should be detailed and professional, suitable for any bank statement, with:
+- Header with {{bank_name}}, {{logo_path}}, and customer service info (e.g., website, phone numbers).
+- Account details for {{account_holder}}, {{account_holder_address}}, {{account_number}}, {{statement_period}}.
+- Important account information section with {{important_info}}.
+- Checking summary table with {{summary}} (fields: beginning_balance, deposits_count, deposits_total, withdrawals_count, withdrawals_total, transactions_count, ending_balance).
+- Deposits table with {{deposits}} (columns: date, description, amount).
+- Withdrawals table with {{withdrawals}} (columns: date, description, amount).
+- Daily balance table with {{statement_start}}, {{statement_end}}, {{balance_map}}.
+- Footnotes section with disclosures.
+- Use professional CSS (Arial font, 12px text, 2px borders, clear section dividers, table layouts).
+Output only the HTML code, no explanations.
+Structure:
+{structure}
+"""
+
+# Used when the model never returns a usable structure
+FALLBACK_STRUCTURE = {
+    "bank_name": "unknown",
+    "fields": [
+        {"name": "account_holder", "variable": "{{account_holder}}", "description": "Name of the account holder"},
+        {"name": "account_number", "variable": "{{account_number}}", "description": "Account number"},
+        {"name": "statement_period", "variable": "{{statement_period}}", "description": "Statement date range"},
+        {"name": "account_type", "variable": "{{account_type}}", "description": "Type of account"},
+        {"name": "account_holder_address", "variable": "{{account_holder_address}}", "description": "Account holder's address"},
+        {"name": "deposits", "variable": "{{deposits}}", "description": "List of deposit transactions"},
+        {"name": "withdrawals", "variable": "{{withdrawals}}", "description": "List of withdrawal transactions"},
+        {"name": "summary", "variable": "{{summary}}", "description": "Summary of balances and transaction counts"},
+        {"name": "important_info", "variable": "{{important_info}}", "description": "Notices and account information"},
+        {"name": "logo_path", "variable": "{{logo_path}}", "description": "Bank logo as base64 data URL"},
+        {"name": "statement_start", "variable": "{{statement_start}}", "description": "Start date of statement period"},
+        {"name": "statement_end", "variable": "{{statement_end}}", "description": "End date of statement period"},
+        {"name": "balance_map", "variable": "{{balance_map}}", "description": "Daily ending balances"},
+        {"name": "show_fee_waiver", "variable": "{{show_fee_waiver}}", "description": "Flag for fee waiver notice"}
+    ],
+    "layout": "Header with bank logo and customer service info, account details section, summary table, deposits and withdrawals tables, daily balance table, footnotes with disclosures."
+}
+
+# Cached results are only reused for the prompts that produced them
+PROMPTS_DIGEST = hashlib.sha256((STRUCTURE_PROMPT + SIMPLIFIED_STRUCTURE_PROMPT + TEMPLATE_PROMPT).encode()).hexdigest()[:16]
+
+_CODE_FENCE = re.compile(r"```[a-zA-Z]*\s*\n(.*?)\n?```", re.DOTALL)
+
+# Base URL of the Ollama server; OLLAMA_HOST may omit the scheme like the ollama CLI allows
+def default_host() -> str:
+    host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+    return (host if "://" in host else f"http://{host}").rstrip("/")
+
+# Minimal client for Ollama's /api/generate endpoint. Connection failures, timeouts and 5xx/429
+# responses are retried with exponential backoff; any HTTP server speaking the same JSON works.
+class OllamaClient:
+    def __init__(self, host: Optional[str] = None, timeout: float = 120.0, retries: int = 2, backoff: float = 1.0):
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+        self.host = (host or default_host()).rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def generate(self, model: str, prompt: str, images: Optional[Sequence[bytes]] = None) -> str:
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if images:
+            payload["images"] = [base64.b64encode(image).decode("ascii") for image in images]
+        body = json.dumps(payload).encode("utf-8")
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                frankenmetrics.incr("extract.retries")
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            request = urllib.request.Request(f"{self.host}/api/generate", data=body, headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())["response"]
+            except urllib.error.HTTPError as e:
+                # Bad model names or payloads fail the same way every time
+                if e.code < 500 and e.code != 429:
+                    raise RuntimeError(f"Ollama rejected the request: HTTP {e.code} {e.reason}")
+                error = e
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                error = e
+        raise RuntimeError(f"Ollama request failed after {self.retries + 1} attempts: {error}")
+
+# Model output with an optional ``` fence removed
+def strip_code_fence(text: str) -> str:
+    match = _CODE_FENCE.search(text)
+    return (match.group(1) if match else text).strip()
+
+# Parse a JSON object out of model output; raises ValueError
+def parse_model_json(text: str) -> Dict:
+    text = strip_code_fence(text)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            raise ValueError("Model response contains no JSON object")
+        data = json.loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("Model response is not a JSON object")
+    return data
+
+# Known bank key for a detected bank name, or "unknown"
+def normalize_bank(name: Optional[str]) -> str:
+    key = re.sub(r"[^a-z]", "", (name or "").lower())
+    return key if key in KNOWN_BANKS else "unknown"
+
+def load_fallback_template() -> str:
+    with open(FALLBACK_TEMPLATE_PATH, encoding="utf-8") as f:
+        return f.read()
+
+# Structures (.json) and templates (.html) keyed by image content hash, model and prompts.
+# Entries live in <cache_dir>/<key[:2]>/<key>.<ext> and are written atomically.
+class ExtractionCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{ext}")
+
+    def _read(self, key: str, ext: str) -> Optional[str]:
+        try:
+            with open(self._path(key, ext), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, ext: str, text: str) -> None:
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".extract_", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get_structure(self, key: str) -> Optional[Dict]:
+        text = self._read(key, "json")
+        return None if text is None else json.loads(text)
+
+    def put_structure(self, key: str, structure: Dict) -> None:
+        self._write(key, "json", json.dumps(structure, indent=2))
+
+    def get_template(self, key: str) -> Optional[str]:
+        return self._read(key, "html")
+
+    def put_template(self, key: str, template: str) -> None:
+        self._write(key, "html", template)
+
+def extraction_key(image: bytes, model: str) -> str:
+    image_hash = hashlib.sha256(image).hexdigest()
+    return hashlib.sha256(f"{image_hash}:{model}:{PROMPTS_DIGEST}".encode()).hexdigest()
+
+class ExtractionResult(BaseModel):
+    image_path: str
+    status: str = Field("ok", description="'ok' or 'failed'; fallbacks still count as ok")
+    key: Optional[str] = Field(None, description="Cache key derived from the image content")
+    bank: str = "unknown"
+    structure: Optional[Dict] = None
+    template: Optional[str] = None
+    structure_source: Optional[str] = Field(None, description="'cache', 'model' or 'fallback'")
+    template_source: Optional[str] = Field(None, description="'cache', 'model' or 'fallback'")
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+# Turns bank statement images into template structures and Jinja templates with a vision model.
+# Results are cached by image content, duplicate images in a batch are extracted once, and at most
+# max_in_flight images are sent to the model at a time. Fallbacks are never cached.
+class TemplateExtractor:
+    def __init__(self, client: Optional[OllamaClient] = None, model: str = DEFAULT_MODEL, cache: Optional[ExtractionCache] = None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.client = client or OllamaClient()
+        self.model = model
+        self.cache = cache or ExtractionCache()
+        self.max_in_flight = max_in_flight
+
+    def _structure(self, key: str, image: bytes, result: ExtractionResult) -> Dict:
+        structure = self.cache.get_structure(key)
+        if structure is not None:
+            frankenmetrics.incr("extract.cache_hits")
+            result.structure_source = "cache"
+            return structure
+        frankenmetrics.incr("extract.cache_misses")
+        errors = []
+        for prompt in (STRUCTURE_PROMPT, SIMPLIFIED_STRUCTURE_PROMPT):
+            try:
+                with frankenmetrics.span("extract.structure"):
+                    structure = parse_model_json(self.client.generate(self.model, prompt, [image]))
+                self.cache.put_structure(key, structure)
+                result.structure_source = "model"
+                return structure
+            except (RuntimeError, ValueError) as e:
+                errors.append(f"{type(e).__name__}: {e}")
+        frankenmetrics.incr("extract.fallbacks")
+        result.structure_source = "fallback"
+        result.error = "; ".join(errors)
+        return FALLBACK_STRUCTURE
+
+    def _template(self, key: str, structure: Dict, cacheable: bool, result: ExtractionResult) -> str:
+        template = self.cache.get_template(key) if cacheable else None
+        if template is not None:
+            result.template_source = "cache"
+            return template
+        try:
+            with frankenmetrics.span("extract.template"):
+                template = strip_code_fence(self.client.generate(self.model, TEMPLATE_PROMPT.format(structure=json.dumps(structure, indent=2))))
+            if "<html" not in template.lower():
+                raise ValueError("Model response is not an HTML document")
+            Environment().parse(template)
+        except (RuntimeError, ValueError, TemplateSyntaxError) as e:
+            frankenmetrics.incr("extract.fallbacks")
+            result.template_source = "fallback"
+            result.error = "; ".join(filter(None, [result.error, f"template: {type(e).__name__}: {e}"]))
+            return load_fallback_template()
+        if cacheable:
+            self.cache.put_template(key, template)
+        result.template_source = "model"
+        return template
+
+    def _extract(self, key: str, image: bytes, image_path: str, with_template: bool) -> ExtractionResult:
+        start = time.perf_counter()
+        result = ExtractionResult(image_path=image_path, key=key)
+        structure = self._structure(key, image, result)
+        result.structure = structure
+        result.bank = normalize_bank(structure.get("bank_name"))
+        if with_template:
+            # A template built from the fallback structure says nothing about this image, so it is not cached either
+            result.template = self._template(key, structure, result.structure_source != "fallback", result)
+        result.seconds = round(time.perf_counter() - start, 4)
+        return result
+
+    def extract(self, image_path: str, with_template: bool = True) -> ExtractionResult:
+        return self.extract_many([image_path], with_template)[0]
+
+    # Extract every image, returning results in input order. Unreadable images give failed results.
+    def extract_many(self, image_paths: Sequence[str], with_template: bool = True) -> List[ExtractionResult]:
+        results: List[Optional[ExtractionResult]] = [None] * len(image_paths)
+        unique: Dict[str, tuple] = {}
+        for i, image_path in enumerate(image_paths):
+            try:
+                with open(image_path, "rb") as f:
+                    image = f.read()
+            except OSError as e:
+                results[i] = ExtractionResult(image_path=image_path, status="failed", error=f"{type(e).__name__}: {e}")
+                continue
+            key = extraction_key(image, self.model)
+            unique.setdefault(key, (image, image_path, []))[2].append(i)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            futures = {key: pool.submit(self._extract, key, image, image_path, with_template) for key, (image, image_path, _) in unique.items()}
+            for key, (_, _, indices) in unique.items():
+                try:
+                    extracted = futures[key].result()
+                except Exception as e:
+                    extracted = ExtractionResult(image_path=unique[key][1], status="failed", key=key, error=f"{type(e).__name__}: {e}")
+                for i in indices:
+                    results[i] = extracted.model_copy(update={"image_path": image_paths[i]})
+        return results
+
+# Write an extracted template as <bank>_template_<image name>.html
+def save_template(result: ExtractionResult, templates_dir: str = TEMPLATES_DIR) -> str:
+    os.makedirs(templates_dir, exist_ok=True)
+    image_name = os.path.splitext(os.path.basename(result.image_path))[0]
+    template_filename = os.path.join(templates_dir, f"{result.bank}_template_{image_name}.html")
+    with open(template_filename, 'w', encoding='utf-8') as f:
+        f.write(result.template)
+    return template_filename
+
+# Image files named directly or found in the given directories
+def find_images(paths: Sequence[str]) -> List[str]:
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images += sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            images.append(path)
+    return images
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Extract bank statement templates from images with an Ollama vision model")
+    parser.add_argument("images", nargs="*", default=[INPUT_IMAGES_DIR], help="Image files or directories")
+    parser.add_argument("--host", default=None, help="Ollama base URL (default: $OLLAMA_HOST or http://localhost:11434)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Images sent to the model at once")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for each model response")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--templates-dir", default=TEMPLATES_DIR)
+    parser.add_argument("--no-templates", action="store_true", help="Only extract structures")
+    args = parser.parse_args(argv)
+
+    extractor = TemplateExtractor(
+        OllamaClient(args.host, timeout=args.timeout, retries=args.retries),
+        model=args.model,
+        cache=ExtractionCache(args.cache_dir),
+        max_in_flight=args.max_in_flight
+    )
+    images = find_images(args.images)
+    if not images:
+        print(f"No images found in {', '.join(args.images)}")
+        return 1
+    start = time.perf_counter()
+    results = extractor.extract_many(images, with_template=not args.no_templates)
+    for result in results:
+        if result.status != "ok":
+            print(f"FAILED {result.image_path}: {result.error}")
+            continue
+        line = f"{result.image_path}: bank={result.bank} structure={result.structure_source}"
+        if result.template is not None:
+            line += f" template={result.template_source} -> {save_template(result, args.templates_dir)}"
+        print(line + (f" ({result.error})" if result.error else ""))
+    failed = sum(1 for r in results if r.status != "ok")
+    print(f"Extracted {len(results) - failed} of {len(results)} images in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,26 @@
+from __future__ import annotations
 import os
+import sys
 import re
-import base64
 import json
-from faker import Faker
 from datetime import datetime, timedelta
 import random
-import pandas as pd
 from pydantic import BaseModel, Field
 from typing import List, Dict
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
 
-# Initialize Faker
-fake = Faker()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frankengen import get_template_env, compute_daily_balances, format_transaction_rows, get_faker, lazy_import
+from frankenassets import logo_data_uri
+import frankenmetrics
+
+pd = lazy_import("pandas")
+pdfkit = lazy_import("pdfkit")
 
 # Directory setup
 SAMPLE_LOGOS_DIR = "sample_logos"
 SYNTHETIC_STAT_DIR = "synthetic_statements"
 TEMPLATES_DIR = "templates"
 
-# Create directories if they don’t exist
-for directory in [SAMPLE_LOGOS_DIR, SYNTHETIC_STAT_DIR, TEMPLATES_DIR]:
-    os.makedirs(directory, exist_ok=True)
-
 # Bank configuration
 BANK_CONFIG = {
     "chase": {
@@ -160,7 +158,7 @@ def generate_bank_statement(num_transactions: int, account_holder: str, account_
         "Balance": [0.0] * num_transactions,
         "Account Holder": [account_holder] * num_transactions,
         "Account Type": [account_type.capitalize()] * num_transactions,
-        "Transaction ID": [(fake.bban()[:10] + str(i).zfill(4)) for i in range(num_transactions)]
+        "Transaction ID": [(get_faker().bban()[:10] + str(i).zfill(4)) for i in range(num_transactions)]
     }
     df = pd.DataFrame(data)
     df = df.sort_values("Date")
@@ -207,6 +205,7 @@ def identify_template_fields(bank: str, templates_dir: str = TEMPLATES_DIR) -> S
     ]
     statement_fields = StatementFields(fields=[f for f in default_fields if f.name in placeholders or f.name in template_content])
     
+    os.makedirs(SYNTHETIC_STAT_DIR, exist_ok=True)
     log_path = os.path.join(SYNTHETIC_STAT_DIR, f"template_fields_{bank}.json")
     with open(log_path, 'w', encoding='utf-8') as f:
         json.dump(statement_fields.model_dump(), f, indent=2)
@@ -220,11 +219,13 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
     if template_name not in BANK_CONFIG[bank]["templates"]:
         raise ValueError(f"Template {template_name} not supported for {bank}")
     
-    env = Environment(loader=FileSystemLoader(template_dir))
+    timer = frankenmetrics.stage_timer("super")
+    env = get_template_env(template_dir)
     
     initial_balance = round(random.uniform(1000, 20000), 2)
-    deposits_total = sum(x for x in df['Amount'] if x > 0)
-    withdrawals_total = abs(sum(x for x in df['Amount'] if x < 0))
+    amounts = df["Amount"].to_numpy(dtype=float)
+    deposits_total = float(amounts[amounts > 0].sum())
+    withdrawals_total = float(abs(amounts[amounts < 0].sum()))
     ending_balance = initial_balance + deposits_total - withdrawals_total
     service_fee = 25 if ending_balance < 5000 else 0
     if service_fee:
@@ -234,16 +235,13 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
     min_date = datetime.strptime(min(df['Date']), "%m/%d").replace(year=2025)
     max_date = datetime.strptime(max(df['Date']), "%m/%d").replace(year=2025)
     statement_date = datetime.now().strftime("%B %d, %Y at %I:%M %p %Z")
+    timer.mark("totals")
     
-    address = fake.address().replace('\n', '<br>')[:100]
+    address = get_faker().address().replace('\n', '<br>')[:100]
     account_holder = account_holder[:50]
-    account_number = fake.bban()[:15]
+    account_number = get_faker().bban()[:15]
     
-    logo_path = os.path.join(SAMPLE_LOGOS_DIR, BANK_CONFIG[bank]["logo"])
-    logo_data = ""
-    if os.path.exists(logo_path):
-        with open(logo_path, "rb") as img_file:
-            logo_data = f"data:image/png;base64,{base64.b64encode(img_file.read()).decode('utf-8')}"
+    logo_data = logo_data_uri(BANK_CONFIG[bank]["logo"], SAMPLE_LOGOS_DIR)
     
     # Important account information
     important_info = """
@@ -318,31 +316,18 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
             <p>Effective July 15, 2025, Wells Fargo will waive overdraft fees for transactions of $5 or less and cap daily overdraft fees at two per day for {account_type.capitalize()} Checking accounts.</p>
             <p>For questions, visit your local Wells Fargo Branch or call the Wells Fargo Customer Service Center at <b>1-800-869-3557</b>, available 24/7.</p>
             """
+    timer.mark("faker")
 
     if bank == "citibank":
-        transactions = []
-        total_debit = abs(sum(x for x in df['Amount'] if x < 0))
-        total_credit = sum(x for x in df['Amount'] if x > 0)
-        running_balance = initial_balance
-        for _, row in df.iterrows():
-            amount = row['Amount']
-            debit = f"£{abs(amount):,.2f}" if amount < 0 else ""
-            credit = f"£{amount:,.2f}" if amount > 0 else ""
-            running_balance += amount
-            transactions.append({
-                "date": row["Date"],
-                "description": row["Description"],
-                "debit": debit,
-                "credit": credit,
-                "balance": f"£{running_balance:,.2f}",
-                "type": row["Type"]
-            })
+        total_debit = float(abs(amounts[amounts < 0].sum()))
+        total_credit = deposits_total
+        transactions = format_transaction_rows(df, initial_balance, currency="£", layout="citibank")["transactions"]
         template_data = {
             "account_holder": account_holder,
-            "client_number": fake.uuid4()[:8],
-            "date_of_birth": fake.date_of_birth(minimum_age=18, maximum_age=80).strftime("%m/%d/%Y"),
+            "client_number": get_faker().uuid4()[:8],
+            "date_of_birth": get_faker().date_of_birth(minimum_age=18, maximum_age=80).strftime("%m/%d/%Y"),
             "customer_account_number": account_number,
-            "customer_iban": f"GB{fake.random_number(digits=2)}CITI{fake.random_number(digits=14)}",
+            "customer_iban": f"GB{get_faker().random_number(digits=2)}CITI{get_faker().random_number(digits=14)}",
             "customer_bank_name": "Citibank",
             "statement_period": f"{min_date.strftime('%B %d')} through {max_date.strftime('%B %d')}",
             "statement_date": statement_date,
@@ -356,38 +341,9 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
             "account_type": "Access Checking" if account_type == "personal" else "Business Checking"
         }
     elif bank in ["wellsfargo", "pnc"]:
-        transactions = []
-        deposits = []
-        withdrawals = []
-        running_balance = initial_balance
-        for _, row in df.sort_values("Date").iterrows():  # Ensure sorted by date
-            amount = row['Amount']
-            transaction_type = row['Type']
-            deposits_credits = f"${amount:,.2f}" if amount > 0 else ""
-            withdrawals_debits = f"${abs(amount):,.2f}" if amount < 0 else ""
-            running_balance += amount
-            transactions.append({
-                "date": row["Date"],
-                "description": row["Description"],
-                "deposits_credits": deposits_credits,
-                "withdrawals_debits": withdrawals_debits,
-                "ending_balance": f"${running_balance:,.2f}",
-                "type": transaction_type
-            })
-            if amount > 0:
-                deposits.append({
-                    "date": row["Date"],
-                    "description": row["Description"],
-                    "amount": f"${amount:,.2f}",
-                    "type": transaction_type
-                })
-            else:
-                withdrawals.append({
-                    "date": row["Date"],
-                    "description": row["Description"],
-                    "amount": f"${abs(amount):,.2f}",
-                    "type": transaction_type
-                })
+        rows = format_transaction_rows(df, initial_balance)
+        transactions, deposits, withdrawals = rows["transactions"], rows["deposits"], rows["withdrawals"]
+        running_balance = initial_balance + df["Amount"].sum()
         # Add service fee to withdrawals if applicable
         if service_fee:
             withdrawals.append({
@@ -397,10 +353,7 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
                 "type": "other"
             })
             running_balance -= service_fee
-        daily_balances = [
-            {"date": row["Date"], "amount": f"${row['Balance']:,.2f}"}
-            for _, row in df.drop_duplicates(subset="Date").iterrows()
-        ]
+        _, daily_balances = compute_daily_balances(df, initial_balance, min_date, max_date)
         summary = {
             "beginning_balance": f"${initial_balance:,.2f}",
             "deposits_total": f"${deposits_total:,.2f}",
@@ -442,24 +395,8 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
             "account_type": "Standard Checking" if account_type == "personal" else "Business Checking"
         }
     else:  # Chase
-        deposits = []
-        withdrawals = []
-        for _, row in df.sort_values("Date").iterrows():
-            amount = row['Amount']
-            if amount > 0:
-                deposits.append({
-                    "date": row["Date"],
-                    "description": row["Description"],
-                    "amount": f"${amount:,.2f}",
-                    "type": row["Type"]
-                })
-            else:
-                withdrawals.append({
-                    "date": row["Date"],
-                    "description": row["Description"],
-                    "amount": f"${abs(amount):,.2f}",
-                    "type": row["Type"]
-                })
+        rows = format_transaction_rows(df, initial_balance)
+        deposits, withdrawals = rows["deposits"], rows["withdrawals"]
         # Add service fee to withdrawals if applicable
         if service_fee:
             withdrawals.append({
@@ -471,21 +408,8 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
         statement_start = min_date
         statement_end = max_date
         day_delta = timedelta(days=1)
-        balance_map = {}
-        running_balance = initial_balance
-        current_date = statement_start
-        while current_date <= statement_end:
-            iso_date = current_date.isoformat()
-            daily_transactions = df[df["Date"] == current_date.strftime("%m/%d")]
-            if not daily_transactions.empty:
-                daily_amount = daily_transactions["Amount"].sum()
-                running_balance += daily_amount
-            balance_map[iso_date] = f"${running_balance:,.2f}"
-            current_date += day_delta
-        daily_balances = [
-            {"date": row["Date"], "amount": f"${row['Balance']:,.2f}"}
-            for _, row in df.drop_duplicates(subset="Date").iterrows()
-        ]
+        balance_map, daily_balances = compute_daily_balances(df, initial_balance, statement_start, statement_end)
+        running_balance = initial_balance + df["Amount"].sum()
         summary = {
             "beginning_balance": f"${initial_balance:,.2f}",
             "deposits_count": len(deposits),
@@ -530,15 +454,20 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
             "balance_map": balance_map
         }
     
+    timer.mark("template_data")
     template = env.get_template(template_name)
     template_name_base = os.path.splitext(template_name)[0]
+    os.makedirs(output_dir, exist_ok=True)
     html_filename = os.path.join(output_dir, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}_{bank}_{template_name_base}.html")
     pdf_filename = os.path.join(output_dir, f"bank_statement_{account_type.upper()}_{account_holder.replace(' ', '_')}_{bank}_{template_name_base}.pdf")
     
     rendered_html = template.render(**template_data)
+    timer.mark("jinja_render")
+    timer.done()
     
-    with open(html_filename, 'w', encoding='utf-8') as f:
-        f.write(rendered_html)
+    with frankenmetrics.span("super.write_html"):
+        with open(html_filename, 'w', encoding='utf-8') as f:
+            f.write(rendered_html)
     
     wkhtmltopdf_path = os.environ.get("WKHTMLTOPDF_PATH", "/usr/bin/wkhtmltopdf")
     config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
@@ -558,7 +487,10 @@ def generate_populated_html_and_pdf(df: pd.DataFrame, account_holder: str, bank:
         "minimum-font-size": "10"
     }
     try:
-        pdfkit.from_string(rendered_html, pdf_filename, configuration=config, options=options)
+        with frankenmetrics.span("super.pdf"):
+            pdfkit.from_string(rendered_html, pdf_filename, configuration=config, options=options)
+        frankenmetrics.incr("super.pdf_rendered")
         return [(html_filename, pdf_filename)]
     except OSError as e:
+        frankenmetrics.incr("super.pdf_failures")
         raise Exception(f"PDF generation failed for {bank} template {template_name}: {e}")
\ No newline at end of file
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import threading
+import pytest
+from frankenasync import AsyncStatementGenerator
+
+# Stand-in for wkhtmltopdf: logs when it starts and stops, sleeps, then prints a tiny PDF
+FAKE_CONVERTER = """import os, sys, time
+log = os.environ["FAKE_CONVERTER_LOG"]
+sys.stdin.read()
+with open(log, "a") as f:
+    f.write(f"start {time.monotonic()}\\n")
+time.sleep(0.2)
+with open(log, "a") as f:
+    f.write(f"stop {time.monotonic()}\\n")
+sys.stdout.write("%PDF-1.4 fake")
+"""
+
+@pytest.fixture
+def converter(tmp_path, monkeypatch):
+    script = tmp_path / "fake_wkhtmltopdf"
+    script.write_text(f"#!{sys.executable}\n{FAKE_CONVERTER}")
+    script.chmod(0o755)
+    log = tmp_path / "conversions.log"
+    monkeypatch.setenv("FAKE_CONVERTER_LOG", str(log))
+    return str(script), log
+
+# Most conversions that were running at the same moment, read back from the converter's log
+def _peak_concurrency(log) -> int:
+    events = sorted((float(time), kind) for kind, time in (line.split() for line in log.read_text().splitlines()))
+    running = peak = 0
+    for _, kind in events:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    return peak
+
+def test_pdf_cap_holds_across_event_loops(converter):
+    path, log = converter
+    generator = AsyncStatementGenerator(max_concurrent_pdfs=1, wkhtmltopdf_path=path, options={})
+
+    async def convert_two():
+        return await asyncio.gather(generator.html_to_pdf("<p>a</p>"), generator.html_to_pdf("<p>b</p>"))
+
+    # Each thread runs its own event loop, like separate asyncio.run callers or Streamlit sessions
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(asyncio.run(convert_two()))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    generator.close()
+    assert results == [b"%PDF-1.4 fake"] * 4
+    assert _peak_concurrency(log) == 1
+
+def test_cancelled_waiter_gives_its_slot_back(converter):
+    path, log = converter
+    generator = AsyncStatementGenerator(max_concurrent_pdfs=1, wkhtmltopdf_path=path, options={})
+
+    async def cancel_waiter():
+        running = asyncio.create_task(generator.html_to_pdf("<p>a</p>"))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(generator.html_to_pdf("<p>b</p>"))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await running
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return await asyncio.wait_for(generator.html_to_pdf("<p>c</p>"), 5)
+
+    assert asyncio.run(cancel_waiter()) == b"%PDF-1.4 fake"
+    generator.close()
+    assert log.read_text().count("start") == 2
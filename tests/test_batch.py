@@ -0,0 +1,56 @@
+import json
+import os
+import pytest
+import frankengen
+from frankengen import BANK_CONFIG, SUPPORTED_COMPONENTS
+from frankenbatch import BatchSpec, generate_batch
+
+# Stand-in for pdfkit that writes the HTML as the "PDF" and fails for one holder
+class _FakePdfkit:
+    @staticmethod
+    def from_string(html, pdf_path, **kwargs):
+        if "BROKEN RENDER" in html:
+            raise OSError("wkhtmltopdf crashed")
+        with open(pdf_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        return True
+
+@pytest.fixture(autouse=True)
+def fake_pdfkit(monkeypatch):
+    monkeypatch.setattr(frankengen, "pdfkit", _FakePdfkit)
+    monkeypatch.setattr(frankengen, "get_pdfkit_configuration", lambda: None)
+
+def _specs():
+    banks = list(BANK_CONFIG)
+    component_map = {component: banks[j] for j, component in enumerate(SUPPORTED_COMPONENTS)}
+    return [
+        BatchSpec(component_map=component_map, account_type="personal", num_transactions=10, seed=1),
+        BatchSpec(component_map={**component_map, "disclosures": "nosuchbank"}, account_type="personal", num_transactions=10, seed=2),
+        BatchSpec(component_map=component_map, account_type="business", num_transactions=10, seed=3, account_holder="BROKEN RENDER"),
+        BatchSpec(component_map=component_map, account_type="business", num_transactions=10, seed=4)
+    ]
+
+def test_failed_items_do_not_stop_the_batch(tmp_path):
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    results = generate_batch(_specs(), workers=1, output_dir=str(tmp_path / "out"), manifest_path=manifest_path)
+    assert [r.status for r in results] == ["ok", "failed", "failed", "ok"]
+    assert "Unsupported bank" in results[1].error
+    assert "wkhtmltopdf crashed" in results[2].error
+    for result in (results[0], results[3]):
+        assert os.path.exists(result.html_path) and os.path.exists(result.pdf_path)
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = [json.loads(line) for line in f]
+    assert [record["status"] for record in manifest] == ["ok", "failed", "failed", "ok"]
+
+def test_cached_results_record_the_generated_account_holder(tmp_path):
+    specs = [spec for spec in _specs() if spec.seed in (1, 4)]
+    plain = generate_batch(specs, workers=1, output_dir=str(tmp_path / "plain"))
+    args = dict(workers=1, output_dir=str(tmp_path / "cached"), cache_dir=str(tmp_path / "cache"))
+    missed = generate_batch(specs, **args)
+    hit = generate_batch(specs, **args)
+    assert [r.cached for r in missed] == [False, False]
+    assert [r.cached for r in hit] == [True, True]
+    holders = [r.account_holder for r in plain]
+    assert all(holders)
+    assert [r.account_holder for r in missed] == holders
+    assert [r.account_holder for r in hit] == holders
@@ -0,0 +1,40 @@
+import io
+import pytest
+from pypdf import PdfReader, PdfWriter
+from frankenbundle import bundle_page_ranges, mark_document, split_bundle
+
+# A bundle shaped like wkhtmltopdf --outline output: each document's title is a top-level bookmark
+# on its first page, with the document's own headings nested below it
+def _bundle(page_counts):
+    writer = PdfWriter()
+    for index, count in enumerate(page_counts):
+        first = len(writer.pages)
+        for _ in range(count):
+            writer.add_blank_page(width=612, height=792)
+        parent = writer.add_outline_item(f"FRANKENDOC-{index:05d}", first)
+        writer.add_outline_item("Important Account Information", first, parent=parent)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def test_bundle_page_ranges_follow_document_bookmarks():
+    assert bundle_page_ranges(_bundle([3, 1, 2]), 3) == [(0, 3), (3, 4), (4, 6)]
+
+def test_split_bundle_writes_each_document_with_its_pages(tmp_path):
+    pdf = _bundle([2, 4, 1])
+    paths = [str(tmp_path / f"statement_{i}.pdf") for i in range(3)]
+    split_bundle(pdf, bundle_page_ranges(pdf, 3), paths)
+    assert [len(PdfReader(path).pages) for path in paths] == [2, 4, 1]
+    assert all(not PdfReader(path).outline for path in paths)
+
+def test_missing_document_bookmark_is_an_error():
+    with pytest.raises(RuntimeError):
+        bundle_page_ranges(_bundle([1, 1]), 3)
+
+def test_mark_document_sets_the_title_only():
+    html = "<html><head><title>Statement</title></head><body>Balance</body></html>"
+    marked = mark_document(html, 7)
+    assert "<title>FRANKENDOC-00007</title>" in marked
+    assert "Statement</title>" not in marked
+    assert marked.endswith("<body>Balance</body></html>")
+    assert "<head><title>FRANKENDOC-00001</title>" in mark_document("<html><head></head><body></body></html>", 1)
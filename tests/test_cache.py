@@ -0,0 +1,67 @@
+import os
+from datetime import datetime
+from frankengen import SUPPORTED_COMPONENTS
+from frankencache import OutputCache, generate_statement_cached
+
+def _artifacts(directory, name, size):
+    paths = {}
+    for kind in ("html", "pdf"):
+        paths[kind] = os.path.join(directory, f"{name}.{kind}")
+        with open(paths[kind], 'wb') as f:
+            f.write(b"x" * size)
+    return paths
+
+def test_get_misses_then_hits_after_put(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"))
+    assert cache.get("ab" * 32) is None
+    stored = cache.put("ab" * 32, _artifacts(tmp_path, "one", 10))
+    found = cache.get("ab" * 32)
+    assert found == stored
+    with open(found["pdf"], 'rb') as f:
+        assert f.read() == b"x" * 10
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_put_evicts_least_recently_used_entries(tmp_path):
+    # Each entry is 200 bytes; the cache holds two and trims to 90% of 500 bytes on overflow
+    cache = OutputCache(str(tmp_path / "cache"), max_bytes=500)
+    keys = ["aa" * 32, "bb" * 32, "cc" * 32]
+    cache.put(keys[0], _artifacts(tmp_path, "first", 100))
+    cache.put(keys[1], _artifacts(tmp_path, "second", 100))
+    # Entry mtime is its last use: make the first entry the most recently used
+    os.utime(tmp_path / "cache" / keys[1][:2] / keys[1], (1, 1))
+    os.utime(tmp_path / "cache" / keys[0][:2] / keys[0], (2, 2))
+    cache.put(keys[2], _artifacts(tmp_path, "third", 100))
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+    assert cache.stats()["bytes"] == 400
+
+def test_cache_size_survives_reopening(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"))
+    cache.put("ab" * 32, _artifacts(tmp_path, "one", 10))
+    assert OutputCache(str(tmp_path / "cache")).stats()["bytes"] == 20
+
+# Writes the HTML itself as the "PDF" so each statement's bytes are easy to tell apart
+class _EchoRenderPool:
+    def render(self, html, pdf_path=None):
+        with open(pdf_path, 'wb') as f:
+            f.write(html.encode())
+        return pdf_path
+
+def test_reusing_an_output_name_does_not_overwrite_cached_artifacts(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"))
+    component_map = {component: "chase" for component in SUPPORTED_COMPONENTS}
+    args = dict(cache=cache, output_dir=str(tmp_path / "out"), output_name="statement_000000_1", render_pool=_EchoRenderPool())
+    _, first_pdf, _, hit = generate_statement_cached(1, component_map, "personal", 10, as_of=datetime(2025, 3, 1), **args)
+    assert not hit
+    with open(first_pdf, 'rb') as f:
+        day_one = f.read()
+    # A hit links the cached files to the output name; the next miss writes to that same name
+    assert generate_statement_cached(1, component_map, "personal", 10, as_of=datetime(2025, 3, 1), **args)[3]
+    assert not generate_statement_cached(1, component_map, "personal", 10, as_of=datetime(2025, 3, 2), **args)[3]
+    _, pdf_path, _, hit = generate_statement_cached(1, component_map, "personal", 10, as_of=datetime(2025, 3, 1), **args)
+    assert hit
+    with open(pdf_path, 'rb') as f:
+        assert f.read() == day_one
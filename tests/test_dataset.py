@@ -0,0 +1,20 @@
+import os
+import frankendataset
+from frankendataset import DocumentSpec, build_dataset
+
+CRASHING_INDEX = 5
+
+# Stands in for build_document: the worker handling one document dies outright, as on a renderer segfault or OOM kill
+def _build_or_crash(spec, *args):
+    if spec.index == CRASHING_INDEX:
+        os._exit(1)
+    return {**spec.model_dump(), "status": "ok", "error": None}
+
+def test_a_crashed_worker_fails_only_its_document(tmp_path, monkeypatch):
+    monkeypatch.setattr(frankendataset, "build_document", _build_or_crash)
+    specs = [DocumentSpec(index=i, component_map={}, account_type="personal", num_transactions=10, seed=i) for i in range(12)]
+    records = list(build_dataset(specs, str(tmp_path), workers=2, identity_pool=None, identity_pool_size=10))
+    assert sorted(record["index"] for record in records) == list(range(12))
+    failed = [record for record in records if record["status"] != "ok"]
+    assert [record["index"] for record in failed] == [CRASHING_INDEX]
+    assert failed[0]["error"].startswith("BrokenProcessPool")
@@ -0,0 +1,69 @@
+import os
+from datetime import datetime
+import numpy as np
+import pyarrow.compute as pc
+import pytest
+from frankengen import generate_ledger, BANK_CONFIG, SUPPORTED_COMPONENTS
+from frankenexport import LedgerExporter, open_export, EXPORT_FORMATS
+
+START = datetime(2025, 3, 1)
+
+def _statements(count):
+    banks = list(BANK_CONFIG)
+    statements = []
+    for i in range(count):
+        account_type = ["personal", "business"][i % 2]
+        # Low opening balances leave some statements under the service-fee threshold
+        opening_balance = 1500.0 if i % 3 == 0 else 15000.0
+        ledger = generate_ledger(5 + i, f"HOLDER {i}", account_type, rng=np.random.default_rng(i), start_date=START, initial_balance=opening_balance)
+        component_map = {component: banks[(i + j) % len(banks)] for j, component in enumerate(SUPPORTED_COMPONENTS)}
+        statements.append((ledger, component_map))
+    return statements
+
+@pytest.mark.parametrize("export_format", EXPORT_FORMATS)
+def test_partitioned_export_round_trips(tmp_path, export_format):
+    statements = _statements(12)
+    with LedgerExporter(str(tmp_path), export_format, partition_by=("account_type", "bank_balance"), row_group_size=40) as exporter:
+        for i, (ledger, component_map) in enumerate(statements):
+            exporter.add(ledger, component_map, statement_start=START, statement_end=datetime(2025, 3, 31), account_number=f"ACCT{i}", seed=i)
+
+    ledgers = open_export(str(tmp_path), "ledgers", export_format).to_table()
+    assert ledgers.num_rows == sum(len(ledger) for ledger, _ in statements)
+    for i, (ledger, component_map) in enumerate(statements):
+        rows = ledgers.filter(pc.field("statement_id") == i).to_pylist()
+        records = ledger.to_records()
+        assert [row["transaction_id"] for row in rows] == [record["Transaction ID"] for record in records]
+        assert [row["description"] for row in rows] == [record["Description"] for record in records]
+        np.testing.assert_allclose([row["balance"] for row in rows], [record["Balance"] for record in records])
+        assert {row["account_type"] for row in rows} == {ledger.account_type}
+        assert {row["bank_balance"] for row in rows} == {component_map["bank_balance"]}
+
+    statement_rows = open_export(str(tmp_path), "statements", export_format).to_table().to_pylist()
+    assert sorted(row["statement_id"] for row in statement_rows) == list(range(len(statements)))
+    first = next(row for row in statement_rows if row["statement_id"] == 3)
+    assert first["account_number"] == "ACCT3"
+    assert first["num_transactions"] == len(statements[3][0])
+    # The JSON reader infers ISO dates as timestamps, so compare the date part only
+    assert str(first["statement_start"])[:10] == "2025-03-01"
+    fees = set()
+    for row in statement_rows:
+        ledger = statements[row["statement_id"]][0]
+        # As in frankengen.statement_totals: a $25 fee when the month ends under $5,000
+        service_fee = 25 if ledger.balances[-1] < 5000 else 0
+        fees.add(service_fee)
+        assert row["opening_balance"] == pytest.approx(float(ledger.balances[0] - ledger.amounts[0]))
+        assert row["service_fee"] == service_fee
+        assert row["closing_balance"] == pytest.approx(float(ledger.balances[-1]) - service_fee)
+    assert fees == {0, 25}
+
+def test_partitions_are_hive_directories_without_leftover_temp_files(tmp_path):
+    with LedgerExporter(str(tmp_path), "parquet") as exporter:
+        for ledger, component_map in _statements(4):
+            exporter.add(ledger, component_map)
+    assert sorted(os.listdir(tmp_path / "ledgers")) == ["account_type=business", "account_type=personal"]
+    for _, _, files in os.walk(tmp_path):
+        assert not [name for name in files if name.startswith(".")]
+
+def test_unknown_partition_column_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        LedgerExporter(str(tmp_path), "parquet", partition_by=("account_holder",))
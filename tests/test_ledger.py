@@ -0,0 +1,29 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from frankengen import generate_ledger, generate_bank_statement, seed_generators
+
+START = datetime(2025, 3, 1)
+
+def test_generate_ledger_is_deterministic_for_a_seed():
+    first = generate_ledger(25, "JANE DOE", "personal", rng=np.random.default_rng(42), start_date=START)
+    second = generate_ledger(25, "JANE DOE", "personal", rng=np.random.default_rng(42), start_date=START)
+    pd.testing.assert_frame_equal(first.to_frame(), second.to_frame())
+
+def test_generate_ledger_differs_across_seeds():
+    first = generate_ledger(25, "ACME LLC", "business", rng=np.random.default_rng(1), start_date=START)
+    second = generate_ledger(25, "ACME LLC", "business", rng=np.random.default_rng(2), start_date=START)
+    assert not first.to_frame().equals(second.to_frame())
+
+def test_seed_generators_makes_the_shared_generator_repeatable():
+    seed_generators(7)
+    first = generate_bank_statement(20, "JANE DOE", "personal", start_date=START)
+    seed_generators(7)
+    second = generate_bank_statement(20, "JANE DOE", "personal", start_date=START)
+    pd.testing.assert_frame_equal(first, second)
+
+def test_generate_ledger_balances_follow_amounts():
+    ledger = generate_ledger(30, "JANE DOE", "personal", rng=np.random.default_rng(3), start_date=START, initial_balance=1000.0)
+    assert len(ledger) == 30
+    np.testing.assert_allclose(ledger.balances, 1000.0 + np.cumsum(ledger.amounts))
+    assert (np.diff(ledger.day_codes) >= 0).all()
@@ -0,0 +1,39 @@
+import sys
+import pytest
+from frankenrender import BoundedRenderPool
+
+# Stand-in for wkhtmltopdf: fails on documents marked FAIL, sleeps on SLOW, otherwise prints a tiny PDF
+FAKE_CONVERTER = """import sys, time
+html = sys.stdin.read()
+if "FAIL" in html:
+    sys.stderr.write("render failed")
+    sys.exit(1)
+time.sleep(5 if "SLOW" in html else 0)
+sys.stdout.write("%PDF-1.4 fake")
+"""
+
+@pytest.fixture
+def converter(tmp_path):
+    script = tmp_path / "fake_wkhtmltopdf"
+    script.write_text(f"#!{sys.executable}\n{FAKE_CONVERTER}")
+    script.chmod(0o755)
+    return str(script)
+
+def test_failed_and_timed_out_jobs_are_counted(converter):
+    with BoundedRenderPool(workers=2, job_timeout=0.5, wkhtmltopdf_path=converter, options={}) as pool:
+        futures = [pool.submit(html) for html in ("<p>one</p>", "<p>FAIL</p>", "<p>SLOW</p>", "<p>two</p>")]
+        assert futures[0].result() == b"%PDF-1.4 fake"
+        with pytest.raises(RuntimeError, match="render failed"):
+            futures[1].result()
+        with pytest.raises(TimeoutError):
+            futures[2].result()
+        assert futures[3].result() == b"%PDF-1.4 fake"
+        stats = pool.stats()
+    assert (stats["jobs_done"], stats["jobs_failed"]) == (2, 2)
+    assert not any(slot["alive"] for slot in pool.health_check())
+
+def test_submit_refuses_work_after_close(converter):
+    pool = BoundedRenderPool(workers=1, wkhtmltopdf_path=converter, options={})
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.submit("<p>late</p>")
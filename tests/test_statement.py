@@ -0,0 +1,46 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from frankengen import SUPPORTED_COMPONENTS, flush_persist, generate_bank_statement, generate_statement_series, persist_failures, persist_outputs_async, render_statement_html
+
+CITIBANK = {component: "citibank" for component in SUPPORTED_COMPONENTS}
+
+# Keeps the rendered HTML of each statement instead of converting it
+class _RecordingRenderPool:
+    def __init__(self):
+        self.html = []
+
+    def render(self, html, pdf_path=None):
+        self.html.append(html)
+        with open(pdf_path, 'wb') as f:
+            f.write(b"%PDF-1.4 fake")
+        return pdf_path
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_ledger_crossing_new_year_takes_years_from_the_statement_date():
+    df = generate_bank_statement(20, "JANE DOE", "personal", rng=np.random.default_rng(0), start_date=datetime(2023, 12, 20), num_days=31)
+    first, last = df["Date"].iloc[0], df["Date"].iloc[-1]
+    assert first.startswith("12/") and last.startswith("01/")
+    html = render_statement_html(df, "JANE DOE", CITIBANK, account_type="personal", initial_balance=5000.0, statement_date=datetime(2024, 1, 20))
+    period = f"{datetime.strptime('2023/' + first, '%Y/%m/%d'):%B %d} through {datetime.strptime('2024/' + last, '%Y/%m/%d'):%B %d}"
+    assert period in html
+
+def test_series_statements_are_dated_at_each_period_end(tmp_path):
+    pool = _RecordingRenderPool()
+    statements = list(generate_statement_series(3, "JANE DOE", CITIBANK, "personal", num_transactions=10, start_month=datetime(2024, 11, 1), output_dir=str(tmp_path), render_pool=pool))
+    assert [statement["statement_end"].date().isoformat() for statement in statements] == ["2024-11-30", "2024-12-31", "2025-01-31"]
+    for statement, html in zip(statements, pool.html):
+        assert f"Created on<br>{statement['statement_end']:%B %d, %Y}" in html
+
+def test_failed_background_writes_are_collected(tmp_path):
+    flush_persist()
+    (tmp_path / "blocked").write_text("a file where a directory should be")
+    good = str(tmp_path / "out" / "statement.html")
+    bad = str(tmp_path / "blocked" / "statement.pdf")
+    persist_outputs_async({good: "<html></html>"})
+    persist_outputs_async({bad: b"%PDF-1.4"})
+    failures = flush_persist()
+    assert [failure["paths"] for failure in failures] == [[bad]]
+    assert failures[0]["error"].startswith(("FileExistsError", "NotADirectoryError"))
+    assert (tmp_path / "out" / "statement.html").read_text() == "<html></html>"
+    assert persist_failures() == []